@@ -1,10 +1,14 @@
 import streamlit as st
-import pandas as pd
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 from src.data_manager import DataManager
-from src.ai_analyst import AIAnalyst
-from src.scheduler import get_scheduler
+from src.metrics import metrics, METRICS_FILE
+from src.snapshot_cache import snapshot_cache
+from src.dedup import group_clusters
+from src.ai_analyst import AIAnalyst, rate_limiter, call_timings, ANALYSIS_MAX_ITEMS
+# pandas, plotly and the worker are imported where they are first needed, so a cold
+# start can paint the cached report and headlines before paying for them
+# (python -m benchmarks.import_profile keeps an eye on this).
 
 # Page Config
 st.set_page_config(
@@ -14,14 +18,25 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize Scheduler (Singleton)
-@st.cache_resource
-def init_scheduler():
-    scheduler = get_scheduler()
-    scheduler.start()
-    return scheduler
+TREND_BUCKETS = {"day": 30, "week": 26}  # Days / weeks shown in the sector trend
+TREND_MAX_SECTORS = 8
+REPORT_HISTORY_SIZE = 30  # Past reports listed in the history picker
 
-scheduler = init_scheduler()
+# Background worker, after the first paint. With EMBEDDED_WORKER off the dashboard is a
+# read-only consumer and ingestion runs in `python -m src.worker`; with it on, this
+# process joins the leader election, so only one replica ingests and analyses anyway.
+@st.cache_resource
+def init_worker():
+    from src.worker import Worker, load_config
+    config = load_config()
+    if not config["EMBEDDED_WORKER"]:
+        return None
+    if not config["GOOGLE_API_KEY"]:
+        try:
+            config["GOOGLE_API_KEY"] = st.secrets.get("GOOGLE_API_KEY")
+        except Exception:
+            pass
+    return Worker(config).start()
 
 # Initialize Managers
 # Removed cache to ensure secrets are re-read if added later
@@ -33,6 +48,7 @@ def get_managers():
     except Exception:
         api_key = None
     
+    # Cheap: the Gemini client is only built on the first model call
     ai = AIAnalyst(api_key=api_key) if api_key else None
     return dm, ai
 
@@ -61,6 +77,116 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
+@st.cache_data(max_entries=8, show_spinner=False)
+def build_sector_chart(report_timestamp, _chart_data):
+    """Figure spec for a report's sector bubbles, built once per report timestamp"""
+    import pandas as pd
+    import plotly.express as px
+    
+    # Prepare data for plotting
+    df = pd.DataFrame(list(_chart_data))
+    
+    # Map sentiment to color
+    color_map = {"맑음": "#ff4b4b", "흐림": "#4b7bff"} # Red for Bullish, Blue for Bearish
+    
+    # Handle empty tickers for display
+    df['tickers_display'] = df['tickers'].apply(lambda x: ", ".join(x) if isinstance(x, list) else str(x))
+    df['size_display'] = df['score'] * 5 # Scale bubble size
+    
+    fig = px.scatter(
+        df, 
+        x="sector", 
+        y="score", 
+        size="size_display", 
+        color="sentiment",
+        color_discrete_map=color_map,
+        hover_name="sector",
+        hover_data={"reason": True, "tickers_display": True, "size_display": False, "score": False, "sector": False},
+        text="sector",
+        size_max=60,
+        height=450 # Slightly taller for legend
+    )
+    
+    fig.update_traces(
+        textposition='top center',
+        hovertemplate="<b>%{hovertext}</b><br><br>상태: %{marker.color}<br>이유: %{customdata[0]}<br>관련주: %{customdata[1]}"
+    )
+    
+    fig.update_layout(
+        showlegend=True,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        ),
+        xaxis={'visible': False}, # Hide X axis labels
+        yaxis={'title': '영향력', 'visible': False}, # Hide Y axis too for cleaner look on mobile
+        plot_bgcolor='rgba(0,0,0,0)',
+        margin=dict(l=10, r=10, t=30, b=10) # Reduce margins
+    )
+    return fig.to_dict()
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def build_trend_chart(granularity, archive_version, _trend):
+    """Line chart of the average score per sector, built once per new report"""
+    import pandas as pd
+    import plotly.express as px
+
+    df = pd.DataFrame(list(_trend), columns=["bucket", "sector", "score", "reports", "bullish"])
+    # Only the sectors the reports keep coming back to, or the legend becomes noise
+    top_sectors = df.groupby("sector")["reports"].sum().nlargest(TREND_MAX_SECTORS).index
+    df = df[df["sector"].isin(top_sectors)]
+
+    fig = px.line(
+        df,
+        x="bucket",
+        y="score",
+        color="sector",
+        markers=True,
+        hover_data={"reports": True, "bullish": ":.0%"},
+        labels={"bucket": "일" if granularity == "day" else "주 (월요일 기준)", "score": "평균 점수",
+                "sector": "섹터", "reports": "리포트 수", "bullish": "맑음 비율"},
+        height=400
+    )
+    fig.update_layout(
+        yaxis={'range': [0, 10.5]},
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        margin=dict(l=10, r=10, t=30, b=10)
+    )
+    return fig.to_dict()
+
+# Sector history from the report archive's daily/weekly rollups
+@st.fragment
+def sector_trend():
+    with st.expander("📈 섹터 점수 추이", expanded=False):
+        granularity = st.radio("단위", ["day", "week"], format_func=lambda g: {"day": "일별 (30일)", "week": "주별 (26주)"}[g], horizontal=True)
+        trend = AIAnalyst.get_sector_trend(granularity, TREND_BUCKETS[granularity])
+        if not trend:
+            st.info("아직 쌓인 리포트가 없습니다.")
+            return
+        archive_version = AIAnalyst.report_archive().version()
+        st.plotly_chart(build_trend_chart(granularity, archive_version, trend), use_container_width=True)
+
+# Earlier reports from the archive index; only the chosen report's body is read
+@st.fragment
+def report_history():
+    with st.expander("🗂 지난 리포트", expanded=False):
+        total, index = AIAnalyst.get_report_index(REPORT_HISTORY_SIZE)
+        if not index:
+            st.info("아직 쌓인 리포트가 없습니다.")
+            return
+        rows = {row["id"]: row for row in index}
+        report_id = st.selectbox(
+            "리포트", list(rows),
+            format_func=lambda rid: f"{datetime.fromisoformat(rows[rid]['timestamp']).strftime('%Y-%m-%d %H:%M')} (섹터 {rows[rid]['sectors']}개)"
+        )
+        st.caption(f"보관된 리포트 {total:,}건 중 최근 {len(index)}건")
+        report = AIAnalyst.get_report(report_id)
+        if report:
+            st.markdown(report['content'])
+
 # Main Dashboard Function
 def main_dashboard():
     # Increment Visitor Stats
@@ -76,68 +202,23 @@ def main_dashboard():
     # 1. Daily Report Section
     st.header("📢 오늘의 시장 브리핑")
     
-    report = None
-    if ai:
-        report = ai.get_latest_report()
+    # Read straight from the shared snapshot; no API key or model client needed
+    report = AIAnalyst.get_latest_report()
     
     if report:
         # --- Visualization Section ---
-        chart_data = ai.extract_chart_data(report['content'])
+        chart_data = report.get('chart_data')
         if chart_data:
             st.subheader("📊 섹터별 기상도")
-            
-            import plotly.express as px
-            
-            # Prepare data for plotting
-            df = pd.DataFrame(chart_data)
-            
-            # Map sentiment to color
-            color_map = {"맑음": "#ff4b4b", "흐림": "#4b7bff"} # Red for Bullish, Blue for Bearish
-            
-            # Handle empty tickers for display
-            df['tickers_display'] = df['tickers'].apply(lambda x: ", ".join(x) if isinstance(x, list) else str(x))
-            df['size_display'] = df['score'] * 5 # Scale bubble size
-            
-            fig = px.scatter(
-                df, 
-                x="sector", 
-                y="score", 
-                size="size_display", 
-                color="sentiment",
-                color_discrete_map=color_map,
-                hover_name="sector",
-                hover_data={"reason": True, "tickers_display": True, "size_display": False, "score": False, "sector": False},
-                text="sector",
-                size_max=60,
-                height=450 # Slightly taller for legend
-            )
-            
-            fig.update_traces(
-                textposition='top center',
-                hovertemplate="<b>%{hovertext}</b><br><br>상태: %{marker.color}<br>이유: %{customdata[0]}<br>관련주: %{customdata[1]}"
-            )
-            
-            fig.update_layout(
-                showlegend=True,
-                legend=dict(
-                    orientation="h",
-                    yanchor="bottom",
-                    y=1.02,
-                    xanchor="right",
-                    x=1
-                ),
-                xaxis={'visible': False}, # Hide X axis labels
-                yaxis={'title': '영향력', 'visible': False}, # Hide Y axis too for cleaner look on mobile
-                plot_bgcolor='rgba(0,0,0,0)',
-                margin=dict(l=10, r=10, t=30, b=10) # Reduce margins
-            )
-            
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(build_sector_chart(report['timestamp'], chart_data), use_container_width=True)
         # -----------------------------
 
         with st.expander("📄 AI 분석 리포트 상세 보기", expanded=False): # Collapsed by default as Chart is above
             st.markdown(report['content'])
             st.caption(f"생성 시간: {report['timestamp']}")
+
+        sector_trend()
+        report_history()
     else:
         st.info("아직 생성된 리포트가 없습니다. 잠시 후 자동으로 생성됩니다.")
 
@@ -145,57 +226,277 @@ def main_dashboard():
 
     # 2. News Feed Section
     st.header("📰 실시간 주요 뉴스")
-    news_items = dm.load_news()
-    
-    if not news_items:
-        st.warning("수집된 뉴스가 없습니다.")
-    else:
-        # Filter/Search
-        search_term = st.text_input("뉴스 검색", placeholder="키워드 입력 (예: 반도체, 삼성전자)")
-        
-        filtered_news = news_items
-        if search_term:
-            term = search_term.lower()
-            filtered_news = [
-                n for n in news_items 
-                if (n['title'] and term in n['title'].lower()) or 
-                   (n.get('summary') and term in n['summary'].lower())
-            ]
-            
-        # Display top 20
-        for item in filtered_news[:20]:
-            with st.container():
-                st.markdown(f"#### [{item['source']}] {item['title']}")
-                st.markdown(f"{item.get('published', '')} | {item['category']}")
-                if item.get('summary'):
-                    summary_clean = item['summary'].replace('<', '(').replace('>', ')') # Basic HTML tag cleaning
-                    st.markdown(f"{summary_clean[:200]}..." if len(summary_clean) > 200 else summary_clean)
-                st.markdown(f"[기사 원문 보기]({item['link']})")
-                st.markdown("---")
+    news_feed()
+
+def render_stories(stories):
+    """A batch of (item, members) stories as a single markdown block, so a page costs
+    one element instead of half a dozen per story"""
+    blocks = []
+    for item, members in stories:
+        published = datetime.fromtimestamp(item['published_ts']).strftime('%Y-%m-%d %H:%M') if item.get('published_ts') else ''
+        lines = [f"#### [{item['source']}] {item['title']}", f"{published} | {item['category']}"]
+        if item.get('snippet'):
+            lines.append(item['snippet'])
+        lines.append(f"[기사 원문 보기]({item['link']})")
+        if len(members) > 1:
+            others = " · ".join(f"[{m['source']}]({m['link']})" for m in members[1:])
+            lines.append(f"🔁 같은 소식 {len(members) - 1}건: {others}")
+        blocks.append("\n\n".join(lines))
+    return "\n\n---\n\n".join(blocks)
+
+def reset_news_list(filters):
+    """Starts the session's list over at the newest page of the current filters"""
+    state = st.session_state
+    state.news_pages, state.news_cursor, state.news_seen = [], None, set()
+    state.news_last_id = dm.news_last_id()
+    load_news_page(filters)
+
+def load_news_page(filters):
+    """Appends the next page of the current filters to the session's list"""
+    state = st.session_state
+    items, state.news_cursor = dm.browse_news(cursor=state.news_cursor, **filters)
+    # The same story from several outlets is shown once, also across pages
+    stories = [
+        (item, members) for item, members in group_clusters(items)
+        if (item.get('cluster_id') or item['link']) not in state.news_seen
+    ]
+    state.news_seen.update(item.get('cluster_id') or item['link'] for item in items)
+    if stories:
+        state.news_pages.append(render_stories(stories))
+
+# Reruns on its own when a filter or "더 보기" changes, leaving the report and chart alone
+@st.fragment
+def news_feed():
+    state = st.session_state
+    dates = state.get("news_dates") or ()
+    filters = {
+        "sources": state.get("news_sources") or None,
+        "categories": state.get("news_categories") or None,
+        "since": dates[0].isoformat() if dates else None,
+        "until": (dates[1] + timedelta(days=1)).isoformat() if len(dates) == 2 else None,
+    }
+    facets = dm.news_facets(**filters)
+
+    search_term = st.text_input("뉴스 검색", placeholder="키워드 입력 (예: 반도체, 삼성전자)")
+    col_source, col_category, col_dates = st.columns([2, 1, 1])
+    with col_source:
+        source_counts = facets["sources"]
+        st.multiselect(
+            "출처", sorted(source_counts, key=lambda name: (-source_counts[name], name)),
+            format_func=lambda name: f"{name} ({source_counts[name]:,})", key="news_sources", placeholder="전체"
+        )
+    with col_category:
+        category_counts = facets["categories"]
+        st.multiselect(
+            "분류", sorted(category_counts, key=lambda name: (-category_counts[name], name)),
+            format_func=lambda name: f"{name} ({category_counts[name]:,})", key="news_categories", placeholder="전체"
+        )
+    with col_dates:
+        first_day = datetime.fromisoformat(facets["first_day"]).date() if facets["first_day"] else None
+        st.date_input("기간", value=(), min_value=first_day, max_value=datetime.now().date(), key="news_dates")
+
+    if not facets["total"]:
+        if any(filters.values()):
+            st.info("조건에 맞는 뉴스가 없습니다.")
+        else:
+            st.warning("수집된 뉴스가 없습니다.")
+        return
+    st.caption(f"조건에 맞는 뉴스 {facets['total']:,}건")
+
+    if search_term:
+        # Indexed search: space separated keywords are AND-ed, best & newest first.
+        # Extra rows are read so 20 stories remain after collapsing near-duplicates.
+        results = dm.search_news(search_term, limit=60, **filters)
+        if results:
+            st.markdown(render_stories(group_clusters(results)[:20]))
+        else:
+            st.info("검색 결과가 없습니다.")
+        return
+
+    # Pages already read are kept per session and only a filter change starts over. News
+    # stored since then is offered as a refresh, so "더 보기" keeps its place in the list.
+    filter_key = tuple((name, tuple(value) if isinstance(value, list) else value) for name, value in filters.items())
+    if state.get("news_filter_key") != filter_key:
+        state.news_filter_key = filter_key
+        reset_news_list(filters)
+    new_count = dm.count_new_news(state.news_last_id, **filters)
+    if new_count:
+        st.button(f"새 뉴스 {new_count:,}건 — 새로고침", on_click=reset_news_list, args=(filters,))
+    for block in state.news_pages:
+        st.markdown(block)
+    if state.news_cursor is not None:
+        st.button("더 보기", on_click=load_news_page, args=(filters,))
 
 # Admin Dashboard Function
 def admin_dashboard():
+    import pandas as pd
+    from src.worker import load_worker_status
+    worker = init_worker()
+    # Published by whichever worker holds the lease (possibly another process)
+    worker_status = load_worker_status()
+    live = bool(worker_status) and time.time() - worker_status["published_at"] < 3 * worker_status["heartbeat_interval"]
+    scheduler = (worker_status.get("scheduler") if live and worker_status.get("leader") else None) or {}
+
     st.title("🛠 관리자 대시보드")
     
     st.subheader("1. 시스템 상태")
     col_status, col_lastrun, col_nextrun = st.columns(3)
     
     with col_status:
-        st.metric("백그라운드 작업", scheduler.status)
+        st.metric("백그라운드 작업", scheduler.get("status") or "작업자 없음")
         
     with col_lastrun:
-        last = scheduler.last_run.strftime('%H:%M:%S') if scheduler.last_run else "없음"
+        last = datetime.fromisoformat(scheduler["last_run"]).strftime('%H:%M:%S') if scheduler.get("last_run") else "없음"
         st.metric("최근 실행", last)
         
     with col_nextrun:
-        next_r = scheduler.next_run.strftime('%H:%M:%S') if scheduler.next_run else "대기 중"
-        st.metric("다음 실행 예정", next_r)
+        next_r = datetime.fromisoformat(scheduler["next_run"]).strftime('%H:%M:%S') if scheduler.get("next_run") else "대기 중"
+        st.metric("다음 분석 (늦어도)", next_r)
 
-    st.info("뉴스 수집 및 AI 리포트 생성은 백그라운드에서 5분 주기로 자동 실행됩니다.")
+    role = "리더" if worker and worker.is_leader else ("대기" if worker else "읽기 전용")
+    leader = worker_status["leader"] if scheduler else "없음"
+    st.caption(f"현재 리더: {leader} | 이 프로세스: {role}")
+    st.info("피드는 게시 빈도에 맞춰 각자 1~30분 주기로 수집되고, AI 리포트는 신규 뉴스가 20건 쌓이거나 10분이 지나면 생성됩니다.")
+
+    # Ingest -> enrich -> analysis stages and what is queued between them
+    if scheduler.get("pipeline"):
+        st.write("파이프라인 단계")
+        pipeline_df = pd.DataFrame(scheduler["pipeline"])
+        pipeline_df["stage"] = pipeline_df["stage"].map({"ingest": "수집", "enrich": "정제/저장", "analysis": "AI 분석"})
+        st.dataframe(
+            pipeline_df.rename(columns={
+                "stage": "단계", "state": "상태", "queue": "대기열", "runs": "처리 횟수", "items": "처리 항목",
+                "avg_seconds": "평균 소요(초)", "items_per_min": "분당 처리", "blocked_seconds": "대기열 막힘(초)"
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+
+    if scheduler.get("job_history"):
+        st.write("최근 작업 결과")
+        history_df = pd.DataFrame(scheduler["job_history"])
+        history_df["time"] = pd.to_datetime(history_df["time"]).dt.strftime('%m-%d %H:%M:%S')
+        st.dataframe(
+            history_df.rename(columns={"time": "실행 시각", "new_items": "신규 뉴스", "outcome": "결과"}),
+            use_container_width=True,
+            hide_index=True
+        )
     
     if st.button("새로고침 (상태 확인)"):
         st.rerun()
 
+    # On-demand analysis, streamed into the page as the experts write
+    if ai:
+        # New stories normally just update the previous report; a rebuild starts over
+        rebuild = st.checkbox("전체 재분석", help="이전 리포트를 새 뉴스로 갱신하지 않고 처음부터 다시 분석합니다.")
+        if st.button("🔄 지금 리포트 생성"):
+            analysis_text = ai.analyze_news(dm.load_news(limit=ANALYSIS_MAX_ITEMS), verbose=True, rebuild=rebuild)
+            if "오류" not in analysis_text and "Error" not in analysis_text:
+                if ai.last_report_unchanged:
+                    st.success("새 뉴스를 검토했지만 리포트를 바꿀 내용이 없습니다.")
+                else:
+                    if not ai.last_analysis_cached:
+                        ai.save_report(analysis_text)
+                    st.success("리포트가 생성되었습니다.")
+            else:
+                st.error(analysis_text)
+
+    # Conditional GET / content hash cache effectiveness
+    cache_summary = dm.get_fetch_cache_summary()
+    col_hit, col_req, col_bytes = st.columns(3)
+    col_hit.metric("피드 캐시 적중률", f"{cache_summary['hit_rate']:.0%}")
+    col_req.metric("누적 요청 (304 / 동일)", f"{cache_summary['requests']:,} ({cache_summary['not_modified']:,} / {cache_summary['unchanged']:,})")
+    col_bytes.metric("누적 다운로드", f"{cache_summary['bytes'] / 1024 / 1024:.1f} MB")
+
+    # Cross-session snapshot cache for news / stats / report
+    cache_stats = snapshot_cache.stats()
+    col_hits, col_misses, col_rate = st.columns(3)
+    col_hits.metric("스냅샷 캐시 적중", f"{cache_stats['hits']:,}")
+    col_misses.metric("스냅샷 캐시 갱신", f"{cache_stats['misses']:,}")
+    col_rate.metric("스냅샷 적중률", f"{cache_stats['hit_rate']:.0%}")
+
+    # Shared Gemini quota usage (sizing the API tier)
+    limiter_stats = rate_limiter.stats()
+    col_calls, col_wait, col_429, col_rejected = st.columns(4)
+    col_calls.metric("Gemini 호출 (대기열)", f"{limiter_stats['admitted']:,} ({limiter_stats['queued']})")
+    col_wait.metric("평균 / 최대 대기", f"{limiter_stats['avg_wait']:.1f}s / {limiter_stats['max_wait']:.1f}s")
+    col_429.metric("429 응답", f"{limiter_stats['rate_limited']:,}")
+    col_rejected.metric("대기 초과 거절", f"{limiter_stats['rejected']:,}")
+
+    # Latency of recent Gemini calls (time to first token / total)
+    if call_timings:
+        st.write("최근 Gemini 호출")
+        timings_df = pd.DataFrame(list(call_timings)[:20])
+        timings_df["time"] = timings_df["time"].dt.strftime('%m-%d %H:%M:%S')
+        st.dataframe(
+            timings_df.rename(columns={
+                "time": "시각", "label": "호출", "ttft": "첫 토큰(초)", "duration": "전체(초)",
+                "prompt_tokens": "프롬프트 토큰", "streamed": "스트리밍"
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+
+    # Hot-path latency percentiles over the recent window of each series
+    metric_rows = metrics.summary()
+    if metric_rows:
+        st.write("성능 지표 (최근 표본 기준 p50 / p95 / p99)")
+        metrics_df = pd.DataFrame(metric_rows)
+        metric_name = st.selectbox("지표", sorted(metrics_df["name"].unique()))
+        selected = metrics_df[metrics_df["name"] == metric_name]
+        selected = selected.assign(series=selected["labels"].replace("", "전체")).set_index("series")
+        st.bar_chart(selected[["p50", "p95", "p99"]], stack=False)
+        st.dataframe(
+            metrics_df.rename(columns={"name": "지표", "labels": "구분", "count": "누적 건수", "mean": "평균"}),
+            use_container_width=True,
+            hide_index=True
+        )
+        st.download_button(
+            "Prometheus 형식으로 내보내기",
+            metrics.to_prometheus(),
+            file_name="metrics.prom",
+            mime="text/plain"
+        )
+        st.caption(f"이 프로세스의 지표입니다. 백그라운드 작업(리더)의 지표는 {METRICS_FILE} 파일에 주기적으로 기록됩니다.")
+
+    # Per-feed latency of each feed's last poll
+    if scheduler.get("feed_stats"):
+        st.write("최근 수집 결과 (피드별 응답 시간)")
+        feed_df = pd.DataFrame(scheduler["feed_stats"])
+        feed_df = feed_df.sort_values("latency", ascending=False, na_position="first")
+        st.dataframe(
+            feed_df[["name", "latency", "entries", "new", "cache", "error"]].rename(columns={
+                "name": "매체명", "latency": "응답 시간(초)", "entries": "항목 수", "new": "신규", "cache": "캐시", "error": "오류"
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+
+    # Adaptive per-feed polling schedule
+    if scheduler.get("feed_schedule"):
+        st.write("피드별 수집 주기")
+        schedule_df = pd.DataFrame(scheduler["feed_schedule"])
+        schedule_df["next_due_at"] = pd.to_datetime(schedule_df["next_due_at"]).dt.strftime('%H:%M:%S')
+        st.dataframe(
+            schedule_df.rename(columns={
+                "name": "매체명", "interval": "주기(초)", "rate_per_hour": "시간당 신규", "last_new": "최근 신규", "next_due_at": "다음 수집"
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+
+    # Traffic from pre-aggregated hourly/daily buckets
+    st.write("방문 추이")
+    col_hourly, col_daily = st.columns(2)
+    hourly = dm.load_visit_series("hour", 48)
+    daily = dm.load_visit_series("day", 30)
+    if hourly:
+        col_hourly.caption("시간별 (최근 48시간)")
+        col_hourly.bar_chart(pd.DataFrame(hourly, columns=["시간", "방문"]).set_index("시간"))
+    if daily:
+        col_daily.caption("일별 (최근 30일)")
+        col_daily.bar_chart(pd.DataFrame(daily, columns=["날짜", "방문"]).set_index("날짜"))
+
     st.divider()
     
     st.subheader("2. RSS 피드 관리")
@@ -257,7 +558,8 @@ def sidebar():
     mode = st.sidebar.radio("이동", ["대시보드", "관리자 모드"])
     
     if mode == "대시보드":
-        main_dashboard()
+        with metrics.timer("page_render_seconds", page="dashboard"):
+            main_dashboard()
     else:
         st.sidebar.divider()
         password = st.sidebar.text_input("관리자 암호", type="password")
@@ -271,7 +573,8 @@ def sidebar():
             correct_password = "admin"
             
         if password == correct_password:
-            admin_dashboard()
+            with metrics.timer("page_render_seconds", page="admin"):
+                admin_dashboard()
         elif password:
             st.sidebar.error("암호가 틀렸습니다.")
         else:
@@ -279,3 +582,5 @@ def sidebar():
 
 if __name__ == "__main__":
     sidebar()
+    # Started once the page has rendered; a no-op on later reruns
+    init_worker()
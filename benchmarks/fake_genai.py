@@ -0,0 +1,86 @@
+import hashlib
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+# Synthesis responses carry a chart block so extract_chart_data has real work to do
+_CHART_BLOCK = """```json
+[
+  {"sector": "반도체", "sentiment": "맑음", "score": 8, "reason": "수요 회복", "tickers": ["삼성전자", "SK하이닉스"]},
+  {"sector": "2차전지", "sentiment": "흐림", "score": 4, "reason": "재고 조정", "tickers": ["LG에너지솔루션"]},
+  {"sector": "조선", "sentiment": "구름조금", "score": 6, "reason": "수주 증가", "tickers": ["HD한국조선해양"]}
+]
+```"""
+
+
+class FakeRateLimitError(Exception):
+    """Looks like the SDK's 429 error to AIAnalyst's retry logic"""
+    code = 429
+
+
+class FakeModels:
+    def __init__(self, latency=0.0, rate_limit_rate=0.0, retry_delay=0.1, seed=0, response_chars=1200):
+        self.latency = latency
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_delay = retry_delay
+        self.response_chars = response_chars
+        self.calls = 0
+        self.rate_limited = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _respond(self, contents):
+        with self._lock:
+            self.calls += 1
+            limited = self._rng.random() < self.rate_limit_rate
+            if limited:
+                self.rate_limited += 1
+        if limited:
+            raise FakeRateLimitError(
+                f"429 RESOURCE_EXHAUSTED. {{'retryDelay': '{self.retry_delay}s'}}"
+            )
+        time.sleep(self.latency)
+        # Deterministic text derived from the prompt
+        digest = hashlib.sha256(contents.encode('utf-8')).hexdigest()
+        body = "\n".join(f"- 분석 항목 {digest[i:i + 8]}" for i in range(0, 64, 8))
+        text = (body + "\n") * max(1, self.response_chars // len(body))
+        if "수석 투자 전략가" in contents:
+            text += "\n" + _CHART_BLOCK
+        usage = SimpleNamespace(
+            prompt_token_count=len(contents) // 3,
+            candidates_token_count=len(text) // 3,
+            total_token_count=(len(contents) + len(text)) // 3,
+        )
+        return text, usage
+
+    def generate_content(self, model, contents, config=None):
+        text, usage = self._respond(contents)
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+    def generate_content_stream(self, model, contents, config=None):
+        text, usage = self._respond(contents)
+        chunks = [text[i:i + 200] for i in range(0, len(text), 200)]
+        for i, chunk in enumerate(chunks):
+            yield SimpleNamespace(text=chunk, usage_metadata=usage if i == len(chunks) - 1 else None)
+
+
+class FakeGenaiClient:
+    """Stand-in for genai.Client: same `client.models.generate_content(_stream)` surface"""
+
+    def __init__(self, api_key=None, **options):
+        self.models = FakeModels(**options)
+
+
+def install(**options):
+    """Makes AIAnalyst build FakeGenaiClients. Returns the shared FakeModels for stats."""
+    import src.ai_analyst as ai_analyst
+    models = FakeModels(**options)
+
+    def client_factory(api_key=None):
+        client = FakeGenaiClient(api_key)
+        client.models = models
+        return client
+
+    ai_analyst.genai = SimpleNamespace(Client=client_factory)
+    return models
@@ -0,0 +1,118 @@
+"""Import-time profile of the dashboard's cold start.
+
+    python -m benchmarks.import_profile            # report, exit 1 if over budget
+    python -m benchmarks.import_profile --json out.json
+
+Imports exactly the modules app.py imports at top level (read from its source) in a
+fresh interpreter under `python -X importtime`, then reports the slowest modules.
+Streamlit itself is reported separately; the budget applies to everything else.
+Modules that should only load on the path that needs them are listed in DEFERRED.
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_FILE = os.path.join(ROOT, 'app.py')
+
+STARTUP_IMPORT_BUDGET_MS = 150   # App modules on top of streamlit
+BASELINE_PACKAGE = "streamlit"
+# Heavy packages that must not be imported before the first paint
+DEFERRED = ("pandas", "plotly", "google.genai", "feedparser", "dateutil", "src.scheduler")
+RUNS = 3  # Best of N, imports are noisy
+
+
+def startup_imports(path=APP_FILE):
+    """Top-level (module scope) imports of a script, in order"""
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def profile_once(modules):
+    """{module: (self_us, cumulative_us)} for one cold interpreter"""
+    code = "import " + BASELINE_PACKAGE + "\n" + "".join(f"import {m}\n" for m in modules if m != BASELINE_PACKAGE)
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, env=dict(os.environ, PYTHONPATH=ROOT)
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+    timings = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        timings[name] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def profile(modules, runs=RUNS):
+    best = None
+    for _ in range(runs):
+        timings = profile_once(modules)
+        total = sum(self_us for self_us, _ in timings.values())
+        if best is None or total < best[0]:
+            best = (total, timings)
+    total_us, timings = best
+
+    # Imported first, so its cumulative time covers everything streamlit pulls in
+    baseline_us = timings.get(BASELINE_PACKAGE, (0, 0))[1]
+    app_us = total_us - baseline_us
+    # Only what the app adds counts against DEFERRED (streamlit itself loads plotly, for one)
+    app_modules = set(timings) - set(profile_once([]))
+    slowest = sorted(
+        ({"module": name, "self_ms": s / 1000, "cumulative_ms": c / 1000} for name, (s, c) in timings.items()),
+        key=lambda row: row["cumulative_ms"], reverse=True
+    )
+    return {
+        "startup_modules": modules,
+        "total_ms": round(total_us / 1000, 1),
+        "baseline_ms": round(baseline_us / 1000, 1),
+        "app_ms": round(app_us / 1000, 1),
+        "budget_ms": STARTUP_IMPORT_BUDGET_MS,
+        "deferred_loaded": [d for d in DEFERRED if any(name == d or name.startswith(d + ".") for name in app_modules)],
+        "slowest": slowest[:25],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time profile of app.py's cold start")
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--runs", type=int, default=RUNS)
+    args = parser.parse_args()
+
+    report = profile(startup_imports(), args.runs)
+    print(f"startup modules: {', '.join(report['startup_modules'])}")
+    print(f"total {report['total_ms']} ms = {BASELINE_PACKAGE} {report['baseline_ms']} ms"
+          f" + app {report['app_ms']} ms (budget {report['budget_ms']} ms)")
+    print("\nslowest imports (cumulative ms):")
+    for row in report["slowest"][:15]:
+        print(f"  {row['cumulative_ms']:>9.1f}  {row['module']}")
+
+    failures = []
+    if report["app_ms"] > STARTUP_IMPORT_BUDGET_MS:
+        failures.append(f"app imports take {report['app_ms']} ms (budget {STARTUP_IMPORT_BUDGET_MS} ms)")
+    if report["deferred_loaded"]:
+        failures.append(f"imported before first paint: {', '.join(report['deferred_loaded'])}")
+    report["failures"] = failures
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    for failure in failures:
+        print(f"\nOVER BUDGET: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
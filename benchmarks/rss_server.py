@@ -0,0 +1,182 @@
+import email.utils
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+
+# Headline vocabulary so titles tokenize, cluster and search like the real feeds
+WORDS = [
+    "삼성전자", "SK하이닉스", "현대차", "반도체", "HBM", "2차전지", "금리", "환율", "코스피", "코스닥",
+    "외국인", "기관", "순매수", "실적", "영업이익", "수출", "연준", "FOMC", "유가", "달러",
+    "급등", "급락", "강세", "약세", "전망", "발표", "우려", "기대", "상승", "하락",
+    "조선", "방산", "바이오", "AI", "엔비디아", "테슬라", "배터리", "수주", "규제", "관세",
+]
+NEW_ITEMS_PER_GENERATION = 3  # Items each feed gains when the server advances
+
+
+# Syllables for made-up names, so the vocabulary is as open as real headlines
+SYLLABLES = "가나다라마바사아자차카타파하거너더러머버서어저처커터퍼허고노도로모보소오조초코토포호구누두루무부수우주추"
+
+
+def _name(rng):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3)))
+
+
+def headline(rng, serial):
+    """Deterministic pseudo-headline; `serial` keeps titles (and links) unique"""
+    words = rng.sample(WORDS, rng.randint(2, 4)) + [_name(rng) for _ in range(rng.randint(2, 3))]
+    rng.shuffle(words)
+    return f"{' '.join(words)} ({serial})"
+
+
+def story(feed_id, item_no, duplicate_rate):
+    """(title, summary) of one feed item. A share of items are the same story carried
+    by several outlets, so near-duplicate clustering has something to do."""
+    if random.Random(f"dup-{feed_id}-{item_no}").random() < duplicate_rate:
+        rng = random.Random(f"story-{item_no}")
+        serial = f"공통 {item_no}"
+    else:
+        rng = random.Random(f"item-{feed_id}-{item_no}")
+        serial = f"{feed_id}-{item_no}"
+    title = headline(rng, serial)
+    summary = f"<p>{' '.join(rng.choice(WORDS) if rng.random() < 0.3 else _name(rng) for _ in range(30))}</p>"
+    return title, summary
+
+
+class FeedServer:
+    """Serves generated RSS (even ids) and Atom (odd ids) feeds at /feed/<id>.xml.
+    Feeds answer conditional GETs with 304 until advance() publishes new items.
+    Listeners are spread over 127.0.0.1..N so the per-host fetch limit behaves like
+    it does against many real publishers."""
+
+    def __init__(self, items_per_feed=20, latency=0.0, failure_rate=0.0, hosts=1,
+                 duplicate_rate=0.1, seed=42):
+        self.items_per_feed = items_per_feed
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.duplicate_rate = duplicate_rate
+        self.generation = 0
+        self.requests = 0
+        self.failures = 0
+        self.bytes_sent = 0
+        self.hosts = []
+        self.port = None
+        self._servers = []
+        self._requested_hosts = hosts
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def start(self):
+        handler = self._make_handler()
+        for i in range(self._requested_hosts):
+            host = f"127.0.0.{i + 1}"
+            try:
+                server = ThreadingHTTPServer((host, self.port or 0), handler)
+            except OSError as e:
+                # Only 127.0.0.1 is guaranteed to exist (e.g. on macOS)
+                if not self._servers:
+                    raise
+                print(f"[bench] {host} unavailable ({e}), using {len(self._servers)} host(s)")
+                break
+            server.daemon_threads = True
+            self.port = server.server_address[1]
+            self.hosts.append(host)
+            self._servers.append(server)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+
+    def urls(self, count):
+        return [
+            f"http://{self.hosts[i % len(self.hosts)]}:{self.port}/feed/{i}.xml"
+            for i in range(count)
+        ]
+
+    def advance(self):
+        with self._lock:
+            self.generation += 1
+
+    def _etag(self, feed_id):
+        return f'"{feed_id}-{self.generation}"'
+
+    def render(self, feed_id):
+        newest = self.items_per_feed + self.generation * NEW_ITEMS_PER_GENERATION
+        now = datetime.now(timezone.utc)
+        entries = []
+        for offset, item_no in enumerate(range(newest - 1, newest - 1 - self.items_per_feed, -1)):
+            title, summary = story(feed_id, item_no, self.duplicate_rate)
+            published = now - timedelta(minutes=10 * offset + feed_id % 7)
+            entries.append((item_no, escape(title), escape(summary), published))
+
+        if feed_id % 2 == 0:
+            items = "".join(
+                f"<item><title>{title}</title><link>http://bench.local/{feed_id}/{item_no}</link>"
+                f"<description>{summary}</description>"
+                f"<pubDate>{email.utils.format_datetime(published)}</pubDate></item>"
+                for item_no, title, summary, published in entries
+            )
+            body = f'<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel><title>bench {feed_id}</title>{items}</channel></rss>'
+        else:
+            items = "".join(
+                f"<entry><title>{title}</title><link href=\"http://bench.local/{feed_id}/{item_no}\"/>"
+                f"<id>http://bench.local/{feed_id}/{item_no}</id><summary type=\"html\">{summary}</summary>"
+                f"<updated>{published.isoformat()}</updated></entry>"
+                for item_no, title, summary, published in entries
+            )
+            body = f'<?xml version="1.0" encoding="utf-8"?><feed xmlns="http://www.w3.org/2005/Atom"><title>bench {feed_id}</title>{items}</feed>'
+        return body.encode('utf-8')
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                with server._lock:
+                    server.requests += 1
+                    failed = server._rng.random() < server.failure_rate
+                    if failed:
+                        server.failures += 1
+                try:
+                    feed_id = int(self.path.rsplit('/', 1)[-1].split('.')[0])
+                except ValueError:
+                    self.send_error(404)
+                    return
+                if failed:
+                    self.send_error(503)
+                    return
+                etag = server._etag(feed_id)
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                body = server.render(feed_id)
+                with server._lock:
+                    server.bytes_sent += len(body)
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/rss+xml; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                # Lets the benchmark process publish new items between cycles
+                if self.path == '/_advance':
+                    server.advance()
+                    self.send_response(204)
+                else:
+                    self.send_response(404)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,383 @@
+"""Offline benchmarks for feed ingestion, the news archive and report generation.
+
+    python -m benchmarks.run                      # full matrix (10-1,000 feeds, 1k-100k archive)
+    python -m benchmarks.run --quick              # small matrix for a quick check
+    python -m benchmarks.run --baseline benchmarks/results/<earlier>.json
+
+Feeds come from a local generated RSS/Atom server and Gemini from a deterministic
+fake, so nothing leaves the machine. Every case runs in a fresh process with its own
+DASHBOARD_DATA_DIR, which keeps peak RSS and bytes written per case. Results are
+written as JSON to benchmarks/results/.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+DEFAULT_FEEDS = "10,100,1000"
+DEFAULT_ARCHIVES = "1000,10000,100000"
+QUICK_FEEDS = "10,50"
+QUICK_ARCHIVES = "1000,5000"
+ARCHIVE_CASE_FEEDS = 50       # Feeds fetched on top of a seeded archive
+ARCHIVE_SEED_BATCH = 1000
+SEARCH_QUERIES = ["반도체", "금리 환율", "삼성전자 실적", "HBM 수출"]
+ANALYSIS_ARCHIVE = 500        # News items in the store for the analysis case
+
+
+# --- Measurements (child process) -------------------------------------
+
+def _peak_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _io_write_bytes():
+    """Bytes this process handed to write() (Linux only)"""
+    try:
+        with open('/proc/self/io') as f:
+            fields = dict(line.split(': ') for line in f.read().splitlines())
+        return int(fields['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _dir_bytes(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - started
+
+
+def _fetch_cycle(dm, label):
+    (new_count, feed_stats), seconds = _timed(dm.fetch_and_update_news)
+    entries = sum(stat['entries'] for stat in feed_stats)
+    return {
+        "cycle": label,
+        "seconds": round(seconds, 3),
+        "new_items": new_count,
+        "entries_parsed": entries,
+        "items_per_sec": round(new_count / seconds, 1) if seconds else None,
+        "entries_per_sec": round(entries / seconds, 1) if seconds else None,
+        "errors": sum(1 for stat in feed_stats if stat['error']),
+        "cache_hits": sum(1 for stat in feed_stats if stat['cache']),
+        "slowest_feed": max((stat['latency'] or 0 for stat in feed_stats), default=0),
+    }
+
+
+def _advance(spec):
+    urllib.request.urlopen(urllib.request.Request(spec["advance_url"], method="POST"), timeout=5).close()
+
+
+def _synthetic_items(count, start=0, fresh=False):
+    """One item a minute going back from now; `fresh` items are the newest instead"""
+    from benchmarks.rss_server import story
+    now = datetime.now()
+    items = []
+    for i in range(start, start + count):
+        title, summary = story(10_000 + i % 200, i, 0.1)
+        age = i - start if fresh else i % (60 * 24 * 25)
+        published = now - timedelta(minutes=age)
+        items.append({
+            'title': title,
+            'link': f"http://bench.local/archive/{i}",
+            'summary': summary,
+            'published': published.astimezone(timezone.utc).isoformat(),
+            'published_ts': int(published.timestamp()),
+            'source': f"archive {i % 200}",
+            'category': ["Economy", "Domestic", "Global", "Sector"][i % 4],
+            'fetched_at': published.isoformat(),
+        })
+    return items
+
+
+def case_ingest(spec):
+    from src.data_manager import DataManager
+    dm = DataManager()
+    cycles = [_fetch_cycle(dm, "cold")]
+    cycles.append(_fetch_cycle(dm, "warm"))  # Nothing changed: 304s
+    _advance(spec)
+    cycles.append(_fetch_cycle(dm, "churn"))  # A few new items per feed
+    return {"cycles": cycles, "stored": dm.store.count()}
+
+
+def case_archive(spec):
+    from src.data_manager import DataManager
+    dm = DataManager()
+    seed_seconds = 0.0
+    for start in range(0, spec["archive"], ARCHIVE_SEED_BATCH):
+        batch = _synthetic_items(min(ARCHIVE_SEED_BATCH, spec["archive"] - start), start)
+        _, seconds = _timed(lambda: dm.store.insert_many(batch))
+        seed_seconds += seconds
+
+    cycle = _fetch_cycle(dm, "cold")
+    _, load_cold = _timed(lambda: dm.load_news(limit=60))
+    _, load_warm = _timed(lambda: dm.load_news(limit=60))
+    _, load_deep = _timed(lambda: dm.load_news(limit=60, offset=spec["archive"] // 2))
+    search_times = [_timed(lambda q=q: dm.search_news(q, 60))[1] for q in SEARCH_QUERIES]
+    # Ten pages deep into two outlets, as a reader clicking "더 보기" would
+    page_times, cursor = [], None
+    for _ in range(10):
+        (_, cursor), seconds = _timed(lambda c=cursor: dm.browse_news(cursor=c, sources=["archive 1", "archive 2"]))
+        page_times.append(seconds)
+        if cursor is None:
+            break
+    _, facets_time = _timed(lambda: dm.news_facets(categories=["Economy"]))
+    return {
+        "seed_seconds": round(seed_seconds, 3),
+        "seed_items_per_sec": round(spec["archive"] / seed_seconds, 1) if seed_seconds else None,
+        "cycles": [cycle],
+        "load_news_cold_ms": round(load_cold * 1000, 2),
+        "load_news_warm_ms": round(load_warm * 1000, 2),
+        "load_news_deep_ms": round(load_deep * 1000, 2),
+        "search_mean_ms": round(sum(search_times) / len(search_times) * 1000, 2),
+        "browse_page_mean_ms": round(sum(page_times) / len(page_times) * 1000, 2),
+        "facets_ms": round(facets_time * 1000, 2),
+        "stored": dm.store.count(),
+    }
+
+
+def case_analysis(spec):
+    from benchmarks import fake_genai
+    models = fake_genai.install(
+        latency=spec["gemini_latency"],
+        rate_limit_rate=spec["gemini_429_rate"],
+        retry_delay=spec["gemini_retry_delay"],
+    )
+    import src.ai_analyst as ai_analyst
+    from src.data_manager import DataManager
+    # Benchmark the pipeline, not the production quota
+    ai_analyst.rate_limiter = ai_analyst.GeminiRateLimiter(rpm=100_000, tpm=1_000_000_000)
+    dm = DataManager()
+    dm.store.insert_many(_synthetic_items(ANALYSIS_ARCHIVE))
+    news = dm.load_news(limit=ai_analyst.ANALYSIS_MAX_ITEMS)
+
+    analyst = ai_analyst.AIAnalyst(api_key="offline")
+    runs = []
+    for i in range(spec["analysis_runs"]):
+        # Cold: every call hits the model
+        ai_analyst.AIAnalyst.cache = ai_analyst.AnalysisCache()
+        ai_analyst.AIAnalyst.digest_cache = ai_analyst.AnalysisCache()
+        if os.path.exists(ai_analyst.ANALYSIS_STATE_FILE):
+            os.remove(ai_analyst.ANALYSIS_STATE_FILE)  # No previous report to update
+        calls_before, limited_before = models.calls, models.rate_limited
+        text, seconds = _timed(lambda: analyst.analyze_news(news, verbose=False))
+        runs.append({
+            "seconds": round(seconds, 3),
+            "model_calls": models.calls - calls_before,
+            "rate_limited": models.rate_limited - limited_before,
+            "ok": not text.startswith("Error") and "오류" not in text,
+            "mode": analyst.last_analysis_mode,
+        })
+    # Same headlines again: the previous report is returned as is
+    _, cached_seconds = _timed(lambda: analyst.analyze_news(news, verbose=False))
+    # A few fresh stories: the previous report is updated with just those
+    dm.store.insert_many(_synthetic_items(5, ANALYSIS_ARCHIVE, fresh=True))
+    calls_before = models.calls
+    _, churn_seconds = _timed(lambda: analyst.analyze_news(dm.load_news(limit=ai_analyst.ANALYSIS_MAX_ITEMS), verbose=False))
+    seconds = [run["seconds"] for run in runs]
+    return {
+        "runs": runs,
+        "mean_seconds": round(sum(seconds) / len(seconds), 3) if seconds else None,
+        "cached_seconds": round(cached_seconds, 4),
+        "churn_seconds": round(churn_seconds, 3),
+        "churn_model_calls": models.calls - calls_before,
+        "churn_mode": analyst.last_analysis_mode,
+    }
+
+
+CASES = {"ingest": case_ingest, "archive": case_archive, "analysis": case_analysis}
+
+
+def run_case(spec):
+    """Child entry point: runs one case and writes its result JSON"""
+    sys.path.insert(0, ROOT)
+    io_before = _io_write_bytes()
+    started = time.perf_counter()
+    result = CASES[spec["case"]](spec)
+    io_after = _io_write_bytes()
+
+    from src.metrics import metrics
+    result.update({
+        "total_seconds": round(time.perf_counter() - started, 3),
+        "peak_rss_mb": _peak_rss_mb(),
+        "bytes_written": io_after - io_before if io_before is not None else None,
+        "data_dir_bytes": _dir_bytes(os.environ["DASHBOARD_DATA_DIR"]),
+        "histograms": metrics.summary(),
+    })
+    with open(spec["result_path"], 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+# --- Orchestration (parent process) ------------------------------------
+
+def _spawn(spec, feed_urls, verbose):
+    data_dir = tempfile.mkdtemp(prefix=f"bench-{spec['case']}-")
+    try:
+        with open(os.path.join(data_dir, 'feeds.json'), 'w', encoding='utf-8') as f:
+            json.dump([
+                {"name": f"bench {i}", "url": url, "category": ["Economy", "Domestic", "Global", "Sector"][i % 4]}
+                for i, url in enumerate(feed_urls)
+            ], f)
+        spec = dict(spec, result_path=os.path.join(data_dir, 'result.json'))
+        env = dict(os.environ, DASHBOARD_DATA_DIR=data_dir, PYTHONPATH=ROOT)
+        output = None if verbose else subprocess.DEVNULL
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.run", "--case-spec", json.dumps(spec)],
+            cwd=ROOT, env=env, stdout=output, stderr=output
+        )
+        if completed.returncode != 0:
+            return {"error": f"exit code {completed.returncode}"}
+        with open(spec["result_path"], encoding='utf-8') as f:
+            return json.load(f)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def _headline(entry):
+    """The numbers compared against a baseline"""
+    result = entry["result"]
+    if "error" in result:
+        return {}
+    values = {"total_seconds": result["total_seconds"], "peak_rss_mb": result["peak_rss_mb"]}
+    for cycle in result.get("cycles", []):
+        values[f"{cycle['cycle']}_cycle_seconds"] = cycle["seconds"]
+    for key in ("load_news_cold_ms", "search_mean_ms", "browse_page_mean_ms", "mean_seconds"):
+        if result.get(key) is not None:
+            values[key] = result[key]
+    return values
+
+
+def _case_id(entry):
+    return f"{entry['case']}:{entry['param']}"
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {_case_id(entry): _headline(entry) for entry in json.load(f)["results"]}
+    print(f"\nvs {baseline_path}")
+    for entry in results:
+        before = baseline.get(_case_id(entry))
+        if not before:
+            continue
+        for key, value in _headline(entry).items():
+            old = before.get(key)
+            if old:
+                print(f"  {_case_id(entry):<16} {key:<24} {old:>10} -> {value:>10}  ({value / old:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline ingestion / analysis benchmarks")
+    parser.add_argument("--feeds", default=DEFAULT_FEEDS, help="comma-separated feed counts")
+    parser.add_argument("--archive", default=DEFAULT_ARCHIVES, help="comma-separated archive sizes")
+    parser.add_argument("--quick", action="store_true", help=f"feeds {QUICK_FEEDS}, archive {QUICK_ARCHIVES}")
+    parser.add_argument("--skip", default="", help="comma-separated cases to skip (ingest,archive,analysis)")
+    parser.add_argument("--items-per-feed", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02, help="feed server latency (s)")
+    parser.add_argument("--failure-rate", type=float, default=0.02, help="share of feed requests answered 503")
+    parser.add_argument("--hosts", type=int, default=16, help="loopback addresses the feeds are spread over")
+    parser.add_argument("--gemini-latency", type=float, default=0.2, help="fake model latency per call (s)")
+    parser.add_argument("--gemini-429-rate", type=float, default=0.1, help="share of model calls answered 429")
+    parser.add_argument("--gemini-retry-delay", type=float, default=0.1)
+    parser.add_argument("--analysis-runs", type=int, default=3)
+    parser.add_argument("--output", help="result file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", help="earlier result file to compare against")
+    parser.add_argument("--verbose", action="store_true", help="show the app's own output")
+    parser.add_argument("--case-spec", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case_spec:
+        run_case(json.loads(args.case_spec))
+        return
+
+    if args.quick:
+        args.feeds, args.archive = QUICK_FEEDS, QUICK_ARCHIVES
+    feed_counts = [int(n) for n in args.feeds.split(",") if n]
+    archive_sizes = [int(n) for n in args.archive.split(",") if n]
+    skip = set(args.skip.split(","))
+
+    from benchmarks.rss_server import FeedServer
+    server = FeedServer(
+        items_per_feed=args.items_per_feed, latency=args.latency,
+        failure_rate=args.failure_rate, hosts=args.hosts
+    ).start()
+    advance_url = f"http://{server.hosts[0]}:{server.port}/_advance"
+    base_spec = {
+        "advance_url": advance_url,
+        "gemini_latency": args.gemini_latency,
+        "gemini_429_rate": args.gemini_429_rate,
+        "gemini_retry_delay": args.gemini_retry_delay,
+        "analysis_runs": args.analysis_runs,
+    }
+
+    plan = []
+    if "ingest" not in skip:
+        plan += [("ingest", n, dict(base_spec, case="ingest", feeds=n), n) for n in feed_counts]
+    if "archive" not in skip:
+        plan += [("archive", n, dict(base_spec, case="archive", archive=n), ARCHIVE_CASE_FEEDS) for n in archive_sizes]
+    if "analysis" not in skip:
+        plan.append(("analysis", ANALYSIS_ARCHIVE, dict(base_spec, case="analysis"), 0))
+
+    results = []
+    try:
+        for case, param, spec, feed_count in plan:
+            print(f"[bench] {case} {param} ...", flush=True)
+            server.generation = 0
+            result = _spawn(spec, server.urls(feed_count), args.verbose)
+            results.append({"case": case, "param": param, "result": result})
+            summary = ", ".join(f"{k}={v}" for k, v in _headline(results[-1]).items()) or result.get("error")
+            print(f"        {summary}", flush=True)
+    finally:
+        server.stop()
+
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            "meta": {
+                "time": datetime.now().isoformat(),
+                "commit": commit,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "feed_hosts": len(server.hosts),
+                "server_requests": server.requests,
+                "server_failures": server.failures,
+                "args": {k: v for k, v in vars(args).items() if k != "case_spec"},
+            },
+            "results": results,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"[bench] results written to {output}")
+
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
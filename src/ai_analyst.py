@@ -1,114 +1,547 @@
 import os
 import json
+import hashlib
+import heapq
+import itertools
+import queue
+import random
+import re
+import threading
+import types
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from datetime import datetime
-from google import genai
-from google.genai import types
-import streamlit as st
 import time
+from src.data_files import DATA_DIR, write_json_atomic
+from src.metrics import metrics, TOKEN_BUCKETS
+from src.snapshot_cache import snapshot_cache, file_version
+from src.dedup import group_clusters, source_names
+from src.prompt_builder import (
+    estimate_tokens, select_news, chunk_stories, plan_chunks, assemble_digests,
+    PROMPT_NEWS_TOKEN_BUDGET, DIGEST_TOKEN_BUDGET
+)
+from src.report_archive import get_report_archive
+from src.text_clean import truncate
+
+# Content-addressed cache of persona/synthesis outputs, shared by every AIAnalyst in the process
+ANALYSIS_CACHE_TTL = 6 * 3600      # seconds
+ANALYSIS_CACHE_MAX_ENTRIES = 64
+# Chunk digests of map-reduce mode; a busy day has a few dozen chunks per window
+DIGEST_CACHE_TTL = 24 * 3600
+DIGEST_CACHE_MAX_ENTRIES = 512
+
+REPORTS_FILE = os.path.join(DATA_DIR, 'reports.json')  # Legacy history, imported into the archive once
+LATEST_REPORT_FILE = os.path.join(DATA_DIR, 'latest_report.json')
+ANALYSIS_STATE_FILE = os.path.join(DATA_DIR, 'analysis_state.json')  # Base of the next incremental update
+
+CHART_JSON_RE = re.compile(r'```json\s*([\s\S]*?)\s*```')
+
+# Shared Gemini quota (set to your API tier's limits)
+GEMINI_RPM_LIMIT = 15                  # requests per minute
+GEMINI_TPM_LIMIT = 1_000_000           # tokens per minute (prompt + response)
+GEMINI_OUTPUT_TOKEN_ESTIMATE = 1500    # reserved per call until the real usage is known
+GEMINI_MAX_RETRIES = 3
+GEMINI_BASE_RETRY_DELAY = 2            # seconds, doubled per attempt when the server gives no hint
+GEMINI_ADMISSION_TIMEOUT = 300         # seconds a call may wait in the queue before being rejected
+
+# google.genai takes over half a second to import, so it is loaded on the first model call
+genai = None
+
+ANALYSIS_CANDIDATE_STORIES = 150  # Newest stories the prompt builder chooses from
+ANALYSIS_MAX_ITEMS = 600          # Newest items callers hand to analyze_news
+MAP_REDUCE_MIN_STORIES = 100      # "auto" mode summarises in chunks above this many recent stories
+MAP_REDUCE_MAX_STORIES = 500
+MAP_REDUCE_WINDOW = 24 * 3600     # seconds; stories published in this window are "recent"
+DIGEST_MODEL = "gemini-2.0-flash-lite"  # Cheap model for the chunk summaries
+DIGEST_MAX_WORKERS = 4
+
+# Incremental mode: small batches of new stories update the previous report instead of
+# re-analysing the whole window; a full rebuild every so often keeps it from drifting
+INCREMENTAL_MAX_NEW_STORIES = 30      # More new stories than this: full rebuild
+INCREMENTAL_MAX_UPDATES = 6           # Updates on top of one full analysis
+INCREMENTAL_REBUILD_INTERVAL = 3 * 3600  # seconds since the last full analysis
+INCREMENTAL_PRIOR_CHARS = 1200        # Previous persona analysis quoted in an update prompt
+INCREMENTAL_NO_CHANGE = "변화 없음"
+
+PRIORITY_INTERACTIVE = 0   # Dashboard users waiting on the screen
+PRIORITY_BACKGROUND = 1    # Scheduler runs
+
+
+class RateLimitTimeout(Exception):
+    pass
+
+
+class GeminiRateLimiter:
+    """Process-wide admission control for Gemini calls.
+    Two token buckets (requests/min and tokens/min) refill continuously; waiting callers
+    are admitted strictly in (priority, arrival) order, so interactive requests jump
+    ahead of background ones. A 429 pauses admission for everyone until the server's
+    retry hint has passed."""
+
+    def __init__(self, rpm=GEMINI_RPM_LIMIT, tpm=GEMINI_TPM_LIMIT):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._cond = threading.Condition()
+        self._waiting = []  # heap of (priority, seq)
+        self._seq = itertools.count()
+        self._request_tokens = float(rpm)
+        self._token_tokens = float(tpm)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        # Stats
+        self.admitted = 0
+        self.rejected = 0
+        self.rate_limited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _refill(self, now):
+        elapsed = now - self._refilled_at
+        self._refilled_at = now
+        self._request_tokens = min(self.rpm, self._request_tokens + elapsed * self.rpm / 60.0)
+        self._token_tokens = min(self.tpm, self._token_tokens + elapsed * self.tpm / 60.0)
+
+    def _time_until_available(self, now, tokens):
+        waits = [self._paused_until - now]
+        if self._request_tokens < 1:
+            waits.append((1 - self._request_tokens) * 60.0 / self.rpm)
+        if self._token_tokens < tokens:
+            waits.append((tokens - self._token_tokens) * 60.0 / self.tpm)
+        return max(waits)
+
+    def acquire(self, tokens, priority=PRIORITY_BACKGROUND, timeout=GEMINI_ADMISSION_TIMEOUT):
+        """Blocks until the call may proceed. Returns the seconds spent waiting."""
+        tokens = min(tokens, self.tpm)  # An oversized prompt still gets through on a full bucket
+        ticket = (priority, next(self._seq))
+        started = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                wait_for = 1.0
+                if self._waiting[0] == ticket:
+                    wait_for = self._time_until_available(now, tokens)
+                    if wait_for <= 0:
+                        heapq.heappop(self._waiting)
+                        self._request_tokens -= 1
+                        self._token_tokens -= tokens
+                        waited = now - started
+                        self.admitted += 1
+                        self.total_wait += waited
+                        self.max_wait = max(self.max_wait, waited)
+                        self._cond.notify_all()
+                        return waited
+                if timeout is not None and now - started + min(wait_for, 1.0) > timeout:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self.rejected += 1
+                    self._cond.notify_all()
+                    raise RateLimitTimeout(f"Gemini quota wait exceeded {timeout}s")
+                self._cond.wait(min(wait_for, 1.0))
+
+    def settle(self, reserved_tokens, actual_tokens):
+        """Corrects the token bucket once the real usage of an admitted call is known"""
+        with self._cond:
+            self._token_tokens -= actual_tokens - reserved_tokens
+
+    def penalize(self, delay):
+        """Server said slow down: hold every caller back for `delay` seconds"""
+        with self._cond:
+            self.rate_limited += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "rate_limited": self.rate_limited,
+                "queued": len(self._waiting),
+                "avg_wait": self.total_wait / self.admitted if self.admitted else 0.0,
+                "max_wait": self.max_wait,
+            }
+
+
+rate_limiter = GeminiRateLimiter()
+
+# Time-to-first-token and total duration of recent Gemini calls (newest first)
+call_timings = deque(maxlen=100)
+
+
+def _genai():
+    global genai
+    if genai is None:
+        from google import genai as genai_module
+        genai = genai_module
+    return genai
+
+
+def _retry_hint(error):
+    """Seconds the server asked us to wait, if it said so"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        if headers.get('Retry-After'):
+            return float(headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        pass
+    match = re.search(r"retryDelay['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)s", str(error))
+    if match:
+        return float(match.group(1))
+    match = re.search(r"retry(?:[- ]after| in)\s*:?\s*(\d+(?:\.\d+)?)", str(error), re.IGNORECASE)
+    if match:
+        return float(match.group(1))
+    return None
+
+
+def _is_rate_limit_error(error):
+    error_msg = str(error)
+    return getattr(error, 'code', None) == 429 or "429" in error_msg or "RESOURCE_EXHAUSTED" in error_msg
+
+
+# Independent expert personas, analysed in parallel before the CIO synthesis
+PERSONAS = [
+    {
+        "key": "macro",
+        "role": "거시경제 분석가",
+        "label": "🌍 거시경제",
+        "start": "🌍 거시경제 전문가가 시장 흐름을 읽고 있습니다...",
+        "prompt": """
+            - 환율, 금리, 유가, 전쟁, 외교 분쟁 등 거시 경제 이슈에 집중하세요.
+            - 이러한 이슈가 한국 금융 시장 전반에 미칠 영향을 예측하세요.
+            - 단기적인 시장 분위기(Bull/Bear)를 진단하세요.
+            """,
+    },
+    {
+        "key": "sector",
+        "role": "산업/섹터 전문 애널리스트",
+        "label": "🏭 산업/섹터",
+        "start": "🏭 산업 분석가가 수혜/피해 업종을 선별 중입니다...",
+        "prompt": """
+            - 뉴스에서 언급된 특정 산업(반도체, 2차전지, 자동차, 방산 등)을 식별하세요.
+            - 각 이슈에 따른 수혜 업종과 악재 업종을 명확히 구분하세요.
+            - 구체적인 종목명(Ticker)이 있다면 포함하세요.
+            """,
+    },
+    {
+        "key": "risk",
+        "role": "리스크 관리자",
+        "label": "⚠️ 리스크",
+        "start": "⚠️ 리스크 관리자가 위험 요소를 점검 중입니다...",
+        "prompt": """
+            - 투자자가 간과하기 쉬운 위험 요소나 악재를 비판적으로 분석하세요.
+            - '묻지마 투자'를 경계할 수 있도록 구체적인 리스크 시나리오를 제시하세요.
+            - 현재 시장에서 '관망'이 필요한 섹터가 있다면 경고하세요.
+            """,
+    },
+]
+MISSING_PERSONA_TEXT = "(보고서 누락: 이 전문가의 분석이 실패했습니다. 나머지 보고서만으로 판단하세요.)"
+
+
+class AnalysisCache:
+    """LRU cache with age-based expiry. Keys are hashes of everything that shapes the output."""
+
+    def __init__(self, ttl=ANALYSIS_CACHE_TTL, max_entries=ANALYSIS_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (created_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(*parts):
+        return hashlib.sha256("\x1f".join(str(p) for p in parts).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry[0] > self.ttl:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
 
 class AIAnalyst:
-    def __init__(self, api_key):
-        self.client = genai.Client(api_key=api_key)
+    cache = AnalysisCache()
+    digest_cache = AnalysisCache(ttl=DIGEST_CACHE_TTL, max_entries=DIGEST_CACHE_MAX_ENTRIES)
+
+    def __init__(self, api_key, priority=PRIORITY_INTERACTIVE):
+        self.api_key = api_key
+        self._client = None  # Built on first use
         self.model = "gemini-2.0-flash" 
+        self.priority = priority  # Queue position for the shared rate limiter
+        self.prompt_token_budget = PROMPT_NEWS_TOKEN_BUDGET  # News tokens per persona prompt
+        self.streaming = True  # Stream responses so the UI can render text as it arrives
+        self.last_analysis_cached = False  # True when analyze_news reused a cached report
+        self.last_report_unchanged = False  # True when an update found nothing that changes the report
+        # "direct": personas read selected headlines; "map_reduce": they read digests of
+        # every story from the last MAP_REDUCE_WINDOW, summarised in chunks by digest_model;
+        # "auto": map-reduce on busy days
+        self.analysis_mode = "auto"
+        self.digest_model = DIGEST_MODEL
+        # Update the previous report with just the new stories when few have arrived
+        self.incremental = True
+        self.last_analysis_mode = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = _genai().Client(api_key=self.api_key)
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    def _cached_persona_analysis(self, persona_role, persona_prompt, news_text, verbose=True, notify=None, on_text=None, previous=None):
+        # Keyed on the exact news block, so a new outlet joining a story ("N개 매체 보도") counts as a change
+        key = AnalysisCache.make_key("persona", self.model, datetime.now().strftime('%Y-%m-%d'),
+                                     news_text, persona_role, persona_prompt, previous or "")
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached, True
+        result = self._generate_persona_analysis(persona_role, persona_prompt, news_text, verbose, notify, on_text, previous)
+        if not result.startswith("Error ("):
+            self.cache.put(key, result)
+        return result, False
+
+    def _generate_persona_analysis(self, persona_role, persona_prompt, news_text, verbose=True, notify=None, on_text=None, previous=None):
+        """Helper to generate analysis from a specific persona perspective with retry logic.
+        `notify` receives progress messages when running off the Streamlit script thread,
+        `on_text` the text generated so far while streaming. With `previous` (the persona's
+        earlier analysis) `news_text` holds only the new stories and the output is what changed."""
 
-    def _generate_persona_analysis(self, persona_role, persona_prompt, news_text, verbose=True):
-        """Helper to generate analysis from a specific persona perspective with retry logic"""
-        
         current_date_str = datetime.now().strftime('%Y-%m-%d')
-        
-        full_prompt = f"""
-        현재 날짜는 **{current_date_str}**입니다.
-        당신은 {persona_role}입니다.
-        아래 뉴스 데이터를 바탕으로 본인의 전문 분야에 집중하여 분석 리포트를 작성해주세요.
-        
-        **뉴스 데이터:**
-        {news_text}
-        
-        **분석 지침:**
-        {persona_prompt}
-        
-        **출력:**
-        핵심 내용을 불렛 포인트로 간결하게 정리해주세요.
-        """
-        
-        max_retries = 3
-        base_delay = 2 # seconds
-        
-        for attempt in range(max_retries):
+
+        if previous is None:
+            full_prompt = f"""
+            현재 날짜는 **{current_date_str}**입니다.
+            당신은 {persona_role}입니다.
+            아래 뉴스 데이터를 바탕으로 본인의 전문 분야에 집중하여 분석 리포트를 작성해주세요.
+
+            **뉴스 데이터:**
+            {news_text}
+
+            **분석 지침:**
+            {persona_prompt}
+
+            **출력:**
+            핵심 내용을 불렛 포인트로 간결하게 정리해주세요.
+            """
+        else:
+            full_prompt = f"""
+            현재 날짜는 **{current_date_str}**입니다.
+            당신은 {persona_role}입니다.
+            아래는 오늘 앞서 작성한 당신의 분석과, 그 이후 새로 들어온 뉴스입니다.
+
+            **이전 분석:**
+            {previous}
+
+            **새 뉴스:**
+            {news_text}
+
+            **분석 지침:**
+            {persona_prompt}
+
+            **출력:**
+            새 뉴스로 인해 이전 분석에서 달라지거나 추가될 점만 3개 이하의 불렛 포인트로 정리해주세요.
+            이전 분석을 바꿀 만한 내용이 없다면 "{INCREMENTAL_NO_CHANGE}"이라고만 답하세요.
+            """
+
+        def report(message):
+            if notify:
+                notify(f"[{persona_role}] {message}")
+            elif verbose:
+                import streamlit as st
+                st.write(message)
+            else:
+                print(message)
+
+        try:
+            return self._call_model(full_prompt, report, on_text, label=persona_role)
+        except Exception as e:
+            return f"Error ({persona_role}): {e}"
+
+    def _call_model(self, contents, report=print, on_text=None, label="gemini", model=None):
+        """Every Gemini call goes through here: shared rate limiter admission,
+        then retries on 429 honouring the server's retry hint plus jitter.
+        In streaming mode `on_text` gets the accumulated text after every chunk."""
+        prompt_tokens = estimate_tokens(contents)
+        print(f"[prompt] {label}: ~{prompt_tokens} prompt tokens")
+        reserved = prompt_tokens + GEMINI_OUTPUT_TOKEN_ESTIMATE
+        for attempt in range(GEMINI_MAX_RETRIES + 1):
+            waited = rate_limiter.acquire(reserved, self.priority)
+            if waited > 1:
+                report(f"⏳ 사용량 한도로 {waited:.0f}초 대기했습니다.")
+            started = time.monotonic()
+            first_token_at = None
+            text = ""
+            usage = None
             try:
-                response = self.client.models.generate_content(
-                    model=self.model,
-                    contents=full_prompt
-                )
-                return response.text
+                if self.streaming:
+                    for chunk in self.client.models.generate_content_stream(
+                        model=model or self.model,
+                        contents=contents
+                    ):
+                        if first_token_at is None:
+                            first_token_at = time.monotonic()
+                        usage = getattr(chunk, 'usage_metadata', None) or usage
+                        if chunk.text:
+                            text += chunk.text
+                            if on_text:
+                                on_text(text)
+                else:
+                    response = self.client.models.generate_content(
+                        model=model or self.model,
+                        contents=contents
+                    )
+                    first_token_at = time.monotonic()
+                    usage = getattr(response, 'usage_metadata', None)
+                    text = response.text
             except Exception as e:
-                error_msg = str(e)
-                if "429" in error_msg or "RESOURCE_EXHAUSTED" in error_msg:
-                    if attempt < max_retries - 1:
-                        sleep_time = base_delay * (2 ** attempt) # 2s, 4s, 8s
-                        if verbose:
-                            st.write(f"⏳ 사용량이 많아 대기 중입니다... ({sleep_time}초)")
-                        else:
-                            print(f"⏳ 사용량이 많아 대기 중입니다... ({sleep_time}초)")
-                        time.sleep(sleep_time)
-                        continue
-                return f"Error ({persona_role}): {error_msg}"
-        return f"Error ({persona_role}): Rate limit exceeded after retries."
-
-    def analyze_news(self, news_items, verbose=True):
+                # A stream that already produced text can't be retried transparently
+                if not _is_rate_limit_error(e) or text or attempt == GEMINI_MAX_RETRIES:
+                    raise
+                hint = _retry_hint(e)
+                delay = hint if hint is not None else GEMINI_BASE_RETRY_DELAY * (2 ** attempt)
+                delay += random.uniform(0, 1)  # Jitter so callers don't retry in lockstep
+                rate_limiter.penalize(delay)
+                metrics.inc("gemini_retries_total", label=label)
+                report(f"⏳ 사용량이 많아 대기 중입니다... ({delay:.0f}초)")
+                continue
+
+            finished = time.monotonic()
+            call_timings.appendleft({
+                "time": datetime.now(),
+                "label": label,
+                "ttft": round(first_token_at - started, 3) if first_token_at else None,
+                "duration": round(finished - started, 3),
+                "prompt_tokens": prompt_tokens,
+                "streamed": self.streaming,
+            })
+            metrics.observe("gemini_call_seconds", finished - started, label=label)
+            if first_token_at:
+                metrics.observe("gemini_ttft_seconds", first_token_at - started, label=label)
+            # Real counts when the API reports them, local estimates otherwise
+            prompt_count = getattr(usage, 'prompt_token_count', None)
+            response_count = getattr(usage, 'candidates_token_count', None)
+            metrics.observe("gemini_prompt_tokens", prompt_count if isinstance(prompt_count, int) else prompt_tokens,
+                            buckets=TOKEN_BUCKETS, label=label)
+            metrics.observe("gemini_response_tokens", response_count if isinstance(response_count, int) else estimate_tokens(text),
+                            buckets=TOKEN_BUCKETS, label=label)
+            actual = getattr(usage, 'total_token_count', None)
+            if isinstance(actual, int):
+                rate_limiter.settle(reserved, actual)
+            return text
+
+    def analyze_news(self, news_items, verbose=True, rebuild=False):
+        """Report for the given news. Updates the previous report with just the new stories
+        when incremental mode allows it; `rebuild` forces a full analysis."""
+        self.last_analysis_cached = False
+        self.last_report_unchanged = False
         if not news_items:
             return "분석할 뉴스가 없습니다."
 
         # 1. Prepare Data
-        # Sort by latest first and take top 50
-        sorted_news = sorted(news_items, key=lambda x: x.get('fetched_at', ''), reverse=True)[:50]
-        news_text = ""
-        for i, item in enumerate(sorted_news):
-            news_text += f"{i+1}. [{item['source']}] {item['title']}\n"
+        # Newest stories first, one entry per near-duplicate cluster
+        sorted_news = sorted(news_items, key=lambda x: x.get('fetched_at', ''), reverse=True)
+        clusters = group_clusters(sorted_news)
+        # The archive always holds plenty of stories; only today's volume makes a busy day
+        recent = self._recent_clusters(clusters)
+        map_reduce = bool(recent) and (self.analysis_mode == "map_reduce" or (
+            self.analysis_mode == "auto" and len(recent) > MAP_REDUCE_MIN_STORIES
+        ))
+        self.last_analysis_mode = "map_reduce" if map_reduce else "direct"
+        state = self._load_analysis_state() if self.incremental and not rebuild else None
+        delta = self._new_stories(state, clusters) if state else None
 
         # 2. Multi-Persona Analysis Phase
-        # Helper to handle status updates depending on verbose mode
+        # Helper to handle status updates when there is no page to write to
         class DummyStatus:
             def __enter__(self): return self
             def __exit__(self, exc_type, exc_val, exc_tb): pass
-            def write(self, text): 
-                if verbose: st.write(text)
-                else: print(text)
+            def write(self, text): print(text)
             def update(self, label, state, expanded): pass
+            def empty(self): return self
+            def markdown(self, text): pass
 
-        # Context manager for status
-        status_ctx = st.status("🕵️ AI 전문가들이 분석 중입니다...", expanded=True) if verbose else DummyStatus()
+        # Context manager for status; streamlit is only needed when rendering into a page
+        if verbose:
+            import streamlit as st
+            status_ctx = st.status("🕵️ AI 전문가들이 분석 중입니다...", expanded=True)
+        else:
+            status_ctx = DummyStatus()
 
         with status_ctx as status:
-            
-            # Persona A: Macro Economist
-            status.write("🌍 거시경제 전문가가 시장 흐름을 읽고 있습니다...")
-            macro_prompt = """
-            - 환율, 금리, 유가, 전쟁, 외교 분쟁 등 거시 경제 이슈에 집중하세요.
-            - 이러한 이슈가 한국 금융 시장 전반에 미칠 영향을 예측하세요.
-            - 단기적인 시장 분위기(Bull/Bear)를 진단하세요.
-            """
-            macro_analysis = self._generate_persona_analysis("거시경제 분석가", macro_prompt, news_text, verbose)
-            
-            # Persona B: Sector Specialist
-            status.write("🏭 산업 분석가가 수혜/피해 업종을 선별 중입니다...")
-            sector_prompt = """
-            - 뉴스에서 언급된 특정 산업(반도체, 2차전지, 자동차, 방산 등)을 식별하세요.
-            - 각 이슈에 따른 수혜 업종과 악재 업종을 명확히 구분하세요.
-            - 구체적인 종목명(Ticker)이 있다면 포함하세요.
-            """
-            sector_analysis = self._generate_persona_analysis("산업/섹터 전문 애널리스트", sector_prompt, news_text, verbose)
+            if delta is not None:
+                if not delta:
+                    status.write("♻️ 새 뉴스가 없어 이전 분석 결과를 재사용합니다.")
+                    if verbose:
+                        status.update(label="✅ 분석 완료! (캐시)", state="complete", expanded=False)
+                    self.last_analysis_mode = "incremental"
+                    self.last_analysis_cached = True
+                    return state["report"]
+                report = self._analyze_delta(state, delta, status, verbose)
+                if report is not None:
+                    return report
+                status.write("⚠️ 변경분 분석에 실패해 전체 분석으로 전환합니다.")
+                self.last_analysis_mode = "map_reduce" if map_reduce else "direct"
 
-            # Persona C: Risk Manager
-            status.write("⚠️ 리스크 관리자가 위험 요소를 점검 중입니다...")
-            risk_prompt = """
-            - 투자자가 간과하기 쉬운 위험 요소나 악재를 비판적으로 분석하세요.
-            - '묻지마 투자'를 경계할 수 있도록 구체적인 리스크 시나리오를 제시하세요.
-            - 현재 시장에서 '관망'이 필요한 섹터가 있다면 경고하세요.
-            """
-            risk_analysis = self._generate_persona_analysis("리스크 관리자", risk_prompt, news_text, verbose)
+            if map_reduce:
+                persona_inputs = self._digest_persona_inputs(recent[:MAP_REDUCE_MAX_STORIES], status)
+                if persona_inputs is None:
+                    status.write("⚠️ 뉴스 요약에 실패해 주요 헤드라인으로 분석합니다.")
+                    self.last_analysis_mode = "direct"
+                    persona_inputs = self._select_persona_inputs(clusters)
+            else:
+                persona_inputs = self._select_persona_inputs(clusters)
+
+            results = self._run_personas(persona_inputs, status, verbose)
+            macro_analysis, macro_cached = results["macro"]
+            sector_analysis, sector_cached = results["sector"]
+            risk_analysis, risk_cached = results["risk"]
+
+            missing = [p["role"] for p in PERSONAS if results[p["key"]][0].startswith("Error (")]
+            if len(missing) == len(PERSONAS):
+                if verbose:
+                    status.update(label="❌ 분석 실패", state="error", expanded=True)
+                return f"Error: 모든 전문가 분석이 실패했습니다. ({macro_analysis})"
+            if missing:
+                status.write(f"⚠️ 일부 전문가 분석 실패, 나머지로 종합합니다: {', '.join(missing)}")
+                if macro_analysis.startswith("Error ("):
+                    macro_analysis = MISSING_PERSONA_TEXT
+                if sector_analysis.startswith("Error ("):
+                    sector_analysis = MISSING_PERSONA_TEXT
+                if risk_analysis.startswith("Error ("):
+                    risk_analysis = MISSING_PERSONA_TEXT
 
             # 3. Synthesis Phase
+            # The synthesis prompt is fully determined by the persona outputs and the date
+            synthesis_key = AnalysisCache.make_key("synthesis", self.model, datetime.now().strftime('%Y-%m-%d'),
+                                                   macro_analysis, sector_analysis, risk_analysis)
+            if macro_cached and sector_cached and risk_cached:
+                cached_report = self.cache.get(synthesis_key)
+                if cached_report is not None:
+                    status.write("♻️ 새 뉴스가 없어 이전 분석 결과를 재사용합니다.")
+                    self._save_analysis_state(clusters, results, cached_report)
+                    if verbose:
+                        status.update(label="✅ 분석 완료! (캐시)", state="complete", expanded=False)
+                    self.last_analysis_cached = True
+                    return cached_report
+
             status.write("📝 수석 전략가가 최종 리포트를 작성 중입니다...")
             final_prompt = f"""
             당신은 투자 자문 회사의 **수석 투자 전략가(Chief Investment Officer)**입니다.
@@ -177,66 +610,433 @@ class AIAnalyst:
             ```
             """
 
+            report_preview = status.empty()
             try:
-                response = self.client.models.generate_content(
-                    model=self.model,
-                    contents=final_prompt
-                )
-                final_report = response.text
+                final_report = self._call_model(final_prompt, status.write, report_preview.markdown,
+                                                label="수석 투자 전략가")
+                if missing:
+                    final_report = f"> ⚠️ 일부 전문가 분석 누락: {', '.join(missing)}\n\n{final_report}"
+                self.cache.put(synthesis_key, final_report)
+                if missing:
+                    # Never update a report missing an expert; the next run analyses in full
+                    self._clear_analysis_state()
+                else:
+                    self._save_analysis_state(clusters, results, final_report)
                 if verbose:
                     status.update(label="✅ 분석 완료!", state="complete", expanded=False)
                 return final_report
             except Exception as e:
                 return f"Final Synthesis Error: {str(e)}"
 
-    def extract_chart_data(self, report_text):
+    @staticmethod
+    def _recent_clusters(clusters, window=MAP_REDUCE_WINDOW):
+        """Clusters with a member published within the last `window` seconds"""
+        cutoff = time.time() - window
+        return [
+            (representative, members) for representative, members in clusters
+            if max(item.get('published_ts') or 0 for item in members) >= cutoff
+        ]
+
+    def _select_persona_inputs(self, clusters):
+        """Direct mode: each persona gets its own selection of headlines under the token budget"""
+        clusters = clusters[:ANALYSIS_CANDIDATE_STORIES]
+        persona_inputs = {}
+        for persona in PERSONAS:
+            news_text, picked, tokens = select_news(clusters, persona["key"], self.prompt_token_budget)
+            print(f"[prompt] {persona['role']}: {len(picked)}/{len(clusters)} stories, ~{tokens} news tokens")
+            persona_inputs[persona["key"]] = news_text
+        return persona_inputs
+
+    def _digest_persona_inputs(self, clusters, status):
+        """Map-reduce mode: summarises the stories chunk by chunk (concurrently, on the cheap
+        model, cached per chunk content) and hands every persona the same digest block.
+        Returns None if no chunk could be summarised."""
+        chunks = plan_chunks(chunk_stories(clusters))
+        digests = {}
+        todo = []
+        for index, chunk in enumerate(chunks):
+            key = AnalysisCache.make_key("digest", self.digest_model, chunk["text"])
+            cached = self.digest_cache.get(key)
+            if cached is not None:
+                digests[index] = cached
+            else:
+                todo.append((index, key, chunk))
+        status.write(f"📚 뉴스 {sum(len(c['stories']) for c in chunks)}건을 {len(chunks)}개 묶음으로 요약합니다 "
+                     f"(새로 요약 {len(todo)}개)")
+
+        messages = queue.Queue()  # Worker threads can't write to the page
+        with ThreadPoolExecutor(max_workers=DIGEST_MAX_WORKERS, thread_name_prefix="digest") as executor:
+            futures = {
+                executor.submit(self._summarise_chunk, chunk, messages.put): (index, key)
+                for index, key, chunk in todo
+            }
+            for future in as_completed(futures):
+                index, key = futures[future]
+                while not messages.empty():
+                    status.write(messages.get_nowait())
+                try:
+                    digests[index] = future.result()
+                    self.digest_cache.put(key, digests[index])
+                except Exception as e:
+                    print(f"Digest Error ({chunks[index]['category']}): {e}")
+        while not messages.empty():
+            status.write(messages.get_nowait())
+        if not digests:
+            return None
+
+        news_text, used, tokens = assemble_digests(
+            [(chunks[index], digests[index]) for index in sorted(digests)], DIGEST_TOKEN_BUDGET
+        )
+        print(f"[prompt] digests: {used}/{len(chunks)} chunks, ~{tokens} news tokens")
+        return {persona["key"]: news_text for persona in PERSONAS}
+
+    def _summarise_chunk(self, chunk, notify):
+        prompt = f"""
+        다음은 같은 분야·시간대에 보도된 뉴스 목록입니다.
+        주식 투자자에게 중요한 사실만 5개 이하의 불렛 포인트로 요약하세요.
+        언급된 기업·섹터명과 수치는 그대로 남기고, 추측이나 투자 의견은 넣지 마세요.
+
+        {chunk['text']}
+        """
+        return self._call_model(prompt, notify, label="digest", model=self.digest_model)
+
+    def _run_personas(self, persona_inputs, status, verbose, previous=None):
+        """Runs all personas concurrently. Worker threads can't touch Streamlit elements,
+        so their progress messages and streamed text are collected here and rendered
+        on the calling thread. `previous` (persona key -> earlier analysis) asks for updates."""
+        messages = queue.Queue()
+        partial = {}    # persona key -> text streamed so far (written by workers)
+        rendered = {}
+        previews = {}
+        results = {}
+        for persona in PERSONAS:
+            status.write(persona["start"])
+            previews[persona["key"]] = status.empty()
+
+        with ThreadPoolExecutor(max_workers=len(PERSONAS), thread_name_prefix="persona") as executor:
+            futures = {}
+            for persona in PERSONAS:
+                future = executor.submit(
+                    self._cached_persona_analysis, persona["role"], persona["prompt"],
+                    persona_inputs[persona["key"]], verbose, messages.put,
+                    lambda text, key=persona["key"]: partial.__setitem__(key, text),
+                    previous[persona["key"]] if previous else None
+                )
+                futures[future] = persona
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                while not messages.empty():
+                    status.write(messages.get_nowait())
+                for persona in PERSONAS:
+                    text = partial.get(persona["key"])
+                    if text and rendered.get(persona["key"]) != text:
+                        previews[persona["key"]].markdown(f"**{persona['label']}**\n\n{text}")
+                        rendered[persona["key"]] = text
+                for future in done:
+                    persona = futures[future]
+                    try:
+                        results[persona["key"]] = future.result()
+                    except Exception as e:
+                        results[persona["key"]] = (f"Error ({persona['role']}): {e}", False)
+                    if results[persona["key"]][0].startswith("Error ("):
+                        status.write(f"❌ {persona['label']} 분석 실패")
+                    else:
+                        previews[persona["key"]].markdown(f"**{persona['label']}**\n\n{results[persona['key']][0]}")
+                        status.write(f"✔️ {persona['label']} 분석 완료")
+        return results
+
+    def _analyze_delta(self, state, delta, status, verbose):
+        """Incremental mode: each persona reads only the new stories next to a compact copy of
+        its earlier analysis and reports what changed, then the CIO revises the previous report.
+        Returns None when an update failed, so the caller runs a full analysis instead;
+        the new stories only count as seen once every persona has read them."""
+        self.last_analysis_mode = "incremental"
+        status.write(f"🧩 새 뉴스 {len(delta)}건만 반영해 이전 리포트를 갱신합니다 "
+                     f"(전체 재분석까지 {INCREMENTAL_MAX_UPDATES - state['updates']}회)")
+        persona_inputs = {}
+        previous = {}
+        for persona in PERSONAS:
+            news_text, picked, tokens = select_news(delta, persona["key"], self.prompt_token_budget)
+            print(f"[prompt] {persona['role']} (update): {len(picked)}/{len(delta)} new stories, ~{tokens} news tokens")
+            persona_inputs[persona["key"]] = news_text
+            prior = state["personas"][persona["key"]]
+            previous[persona["key"]] = "\n\n".join([truncate(prior["base"], INCREMENTAL_PRIOR_CHARS)] + prior["notes"])
+        results = self._run_personas(persona_inputs, status, verbose, previous)
+
+        if any(text.startswith("Error (") for text, _ in results.values()):
+            return None
+        notes = {key: text.strip() for key, (text, _) in results.items()}
+        changes = {key: note for key, note in notes.items()
+                   if not note.lstrip('-*• ').startswith(INCREMENTAL_NO_CHANGE)}
+
+        if changes:
+            try:
+                report = self._revise_report(state["report"], changes, status)
+            except Exception as e:
+                return f"Final Synthesis Error: {str(e)}"
+            # A revision that lost the chart block would blank the dashboard
+            if self.extract_chart_data(state["report"]) and not self.extract_chart_data(report):
+                return None
+            stamp = datetime.now().strftime('%H:%M')
+            for key, note in changes.items():
+                state["personas"][key]["notes"].append(f"({stamp} 업데이트)\n{note}")
+            state["updates"] += 1
+            state["report"] = report
+        else:
+            status.write("♻️ 새 뉴스가 이전 분석을 바꾸지 않아 리포트를 그대로 유지합니다.")
+            report = state["report"]
+            self.last_report_unchanged = True
+
+        state["seen"] = ([self._story_key(story) for story in delta] + state["seen"])[:MAP_REDUCE_MAX_STORIES]
+        state["updated_at"] = time.time()
+        self._write_analysis_state(state)
+        if verbose:
+            status.update(label="✅ 분석 완료! (업데이트)", state="complete", expanded=False)
+        return report
+
+    def _revise_report(self, previous_report, changes, status):
+        """CIO pass of an incremental update: the previous report revised with the persona updates"""
+        updates = "\n\n".join(f"**[{persona['label']}]**\n{changes[persona['key']]}"
+                              for persona in PERSONAS if persona["key"] in changes)
+        key = AnalysisCache.make_key("revision", self.model, datetime.now().strftime('%Y-%m-%d'),
+                                     previous_report, updates)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        status.write("📝 수석 전략가가 리포트를 갱신 중입니다...")
+        prompt = f"""
+        현재 날짜는 **{datetime.now().strftime('%Y-%m-%d')}**입니다.
+        당신은 투자 자문 회사의 **수석 투자 전략가(Chief Investment Officer)**입니다.
+        아래는 오늘 앞서 발행한 **'오늘의 주가 가이드 리포트'**와, 그 이후 들어온 새 뉴스에 대한 전문가들의 업데이트입니다.
+
+        ---
+        **[이전 리포트]**
+        {previous_report}
+
+        **[전문가 업데이트]**
+        {updates}
+        ---
+
+        **작성 요구사항:**
+        1. 전문가 업데이트를 반영해 이전 리포트를 고쳐 쓰세요. 업데이트와 관계없는 내용은 그대로 두세요.
+        2. 새 뉴스가 이전 판단을 뒤집는 경우에만 섹터의 날씨(맑음/흐림)와 점수를 바꾸세요.
+        3. 이전 리포트와 같은 Markdown 형식으로 리포트 전체를 출력하고, 맨 마지막의 JSON 데이터 블록(```json ... ```)도 같은 형식으로 갱신해 포함하세요.
+        """
+        report_preview = status.empty()
+        report = self._call_model(prompt, status.write, report_preview.markdown, label="수석 투자 전략가")
+        self.cache.put(key, report)
+        return report
+
+    @staticmethod
+    def _story_key(story):
+        """Identity of a (representative, members) story for incremental mode; another outlet
+        joining a story changes its prompt line, so the outlet count is part of it"""
+        item, members = story
+        return f"{item.get('cluster_id') or item['link']}:{len(source_names(members))}"
+
+    def _load_analysis_state(self):
+        """What the next incremental update builds on, or None when a full analysis is due:
+        no previous run, a new day, another model, or too many updates / too long since
+        the last full analysis (updates on updates drift)"""
+        try:
+            with open(ANALYSIS_STATE_FILE, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if (state.get("date") != datetime.now().strftime('%Y-%m-%d')
+                or state.get("model") != self.model
+                or state.get("updates", 0) >= INCREMENTAL_MAX_UPDATES
+                or time.time() - state.get("base_at", 0) > INCREMENTAL_REBUILD_INTERVAL):
+            return None
+        return state
+
+    def _new_stories(self, state, clusters):
+        """Stories in the analysis window the previous report hasn't seen, newest first.
+        None when there are too many for an update to pay off."""
+        seen = set(state["seen"])
+        delta = [story for story in clusters[:MAP_REDUCE_MAX_STORIES] if self._story_key(story) not in seen]
+        return delta if len(delta) <= INCREMENTAL_MAX_NEW_STORIES else None
+
+    def _save_analysis_state(self, clusters, results, report):
+        """After a full analysis: its persona outputs and report become the new base"""
+        if not self.incremental:
+            return
+        now = time.time()
+        self._write_analysis_state({
+            "date": datetime.now().strftime('%Y-%m-%d'),
+            "model": self.model,
+            "base_at": now,
+            "updated_at": now,
+            "updates": 0,
+            "seen": [self._story_key(story) for story in clusters[:MAP_REDUCE_MAX_STORIES]],
+            "personas": {key: {"base": text, "notes": []} for key, (text, _) in results.items()},
+            "report": report,
+        })
+
+    @staticmethod
+    def _clear_analysis_state():
+        try:
+            os.remove(ANALYSIS_STATE_FILE)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Error clearing analysis state: {e}")
+
+    def _write_analysis_state(self, state):
+        try:
+            write_json_atomic(ANALYSIS_STATE_FILE, state, indent=4)
+        except OSError as e:
+            print(f"Error saving analysis state: {e}")
+
+    @classmethod
+    def extract_chart_data(cls, report_text):
         """Extracts JSON block from the report text for visualization"""
-        import re
+        match = CHART_JSON_RE.search(report_text or '')
+        if not match:
+            return []
+        json_str = match.group(1)
         try:
-            match = re.search(r'```json\s*([\s\S]*?)\s*```', report_text)
-            if match:
-                json_str = match.group(1)
-                return json.loads(json_str)
+            data = json.loads(json_str)
         except Exception:
-            pass
-        return []
+            # The prompt's example carries // comments which the model sometimes copies
+            try:
+                data = json.loads(re.sub(r'(?m)\s//[^\n]*$', '', json_str))
+            except Exception:
+                return []
+        return cls._validate_chart_data(data)
 
-    def save_report(self, report_content):
-        # Save to reports.json with timestamp
-        data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
-        reports_file = os.path.join(data_dir, 'reports.json')
-        
-        new_report = {
-            "date": datetime.now().strftime('%Y-%m-%d'),
-            "timestamp": datetime.now().isoformat(),
-            "content": report_content
+    @staticmethod
+    def _validate_chart_data(data):
+        """Keeps well-formed sector entries only, with normalised types"""
+        if not isinstance(data, list):
+            return []
+        valid = []
+        for entry in data:
+            if not isinstance(entry, dict) or not entry.get('sector'):
+                continue
+            try:
+                score = max(1, min(10, int(round(float(entry.get('score', 5))))))
+            except (TypeError, ValueError):
+                continue
+            sentiment = entry.get('sentiment')
+            if sentiment not in ("맑음", "흐림"):
+                sentiment = "맑음" if score > 5 else "흐림"
+            tickers = entry.get('tickers') or []
+            if not isinstance(tickers, list):
+                tickers = [str(tickers)]
+            valid.append({
+                "sector": str(entry['sector']),
+                "sentiment": sentiment,
+                "score": score,
+                "reason": str(entry.get('reason', '')),
+                "tickers": [str(t) for t in tickers],
+            })
+        return valid
+
+    @staticmethod
+    def strip_chart_data(report_text):
+        """Report markdown without the machine-readable JSON block"""
+        return CHART_JSON_RE.sub('', report_text or '').rstrip()
+
+    def _build_report_record(self, report_content):
+        now = datetime.now()
+        return {
+            "date": now.strftime('%Y-%m-%d'),
+            "timestamp": now.isoformat(),
+            "content": self.strip_chart_data(report_content),
+            "chart_data": self.extract_chart_data(report_content),
         }
 
-        try:
-            if os.path.exists(reports_file):
-                with open(reports_file, 'r', encoding='utf-8') as f:
-                    reports = json.load(f)
-            else:
-                reports = []
-            
-            # Prepend new report
-            reports.insert(0, new_report)
-            # Keep last 30 reports
-            reports = reports[:30]
+    @classmethod
+    def report_archive(cls):
+        archive = get_report_archive()
+        if os.path.exists(REPORTS_FILE):
+            archive.import_json(REPORTS_FILE, prepare=cls._upgrade_report_record)
+        return archive
+
+    @classmethod
+    def _upgrade_report_record(cls, report):
+        """Reports saved before chart data was parsed at save time"""
+        if 'chart_data' not in report:
+            report = dict(
+                report,
+                chart_data=cls.extract_chart_data(report['content']),
+                content=cls.strip_chart_data(report['content'])
+            )
+        return report
+
+    def save_report(self, report_content):
+        # Chart JSON is parsed and validated once here instead of on every page view
+        new_report = self._build_report_record(report_content)
 
-            with open(reports_file, 'w', encoding='utf-8') as f:
-                json.dump(reports, f, indent=4, ensure_ascii=False)
+        try:
+            # One appended row (plus its sector scores), nothing rewritten
+            self.report_archive().append(new_report)
+            # Small pointer file so the dashboard never has to query the history
+            write_json_atomic(LATEST_REPORT_FILE, new_report, indent=4)
             return True
         except Exception as e:
             print(f"Error saving report: {e}")
             return False
 
-    def get_latest_report(self):
-        data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
-        reports_file = os.path.join(data_dir, 'reports.json')
-        if os.path.exists(reports_file):
-            with open(reports_file, 'r', encoding='utf-8') as f:
-                reports = json.load(f)
-                if reports:
-                    return reports[0]
+    @classmethod
+    def get_sector_trend(cls, granularity="day", buckets=30):
+        """Pre-aggregated sector scores (see ReportArchive.sector_trend), shared across
+        sessions until the next report is saved"""
+        archive = cls.report_archive()
+        return snapshot_cache.get(
+            f"sector_trend:{granularity}:{buckets}", archive.version(),
+            lambda: tuple(archive.sector_trend(granularity, buckets))
+        )
+
+    @classmethod
+    def get_report_index(cls, limit=30):
+        """(reports archived, newest `limit` index rows without bodies), shared across
+        sessions until the next report is saved"""
+        archive = cls.report_archive()
+        return snapshot_cache.get(
+            f"report_index:{limit}", archive.version(),
+            lambda: (archive.count(), tuple(archive.index(limit)))
+        )
+
+    @classmethod
+    def get_report(cls, report_id):
+        """One archived report ({id, timestamp, date, content, chart_data}), None if unknown"""
+        return cls.report_archive().get(report_id)
+
+    @classmethod
+    def get_latest_report(cls):
+        """Latest report as a read-only mapping, shared across sessions until the pointer file changes.
+        Needs no API key: AIAnalyst.get_latest_report() works without an instance."""
+        with metrics.timer("report_load_seconds"):
+            return cls._get_latest_report()
+
+    @classmethod
+    def _get_latest_report(cls):
+        version = file_version(LATEST_REPORT_FILE)
+        if version is not None:
+            report = snapshot_cache.get("latest_report", version, cls._load_latest_report)
+            if report is not None:
+                return report
+
+        # Reports saved before the pointer file existed
+        latest = cls.report_archive().latest()
+        if latest:
+            latest = {key: latest[key] for key in ("date", "timestamp", "content", "chart_data")}
+            write_json_atomic(LATEST_REPORT_FILE, latest, indent=4)
+            latest['chart_data'] = tuple(latest['chart_data'])
+            return types.MappingProxyType(latest)
         return None
+
+    @staticmethod
+    def _load_latest_report():
+        try:
+            with metrics.timer("snapshot_decode_seconds", key="latest_report"):
+                with open(LATEST_REPORT_FILE, 'r', encoding='utf-8') as f:
+                    report = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        report['chart_data'] = tuple(report.get('chart_data') or ())
+        return types.MappingProxyType(report)
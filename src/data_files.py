@@ -0,0 +1,28 @@
+import json
+import os
+import threading
+
+# DASHBOARD_DATA_DIR points the app at another data directory (benchmarks, workers)
+DATA_DIR = os.environ.get('DASHBOARD_DATA_DIR') or os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
+
+
+def write_atomic(path, text):
+    """Writes to a temp file and swaps it in, so readers never see a partial file.
+    The temp name is unique per process and thread, so concurrent writers don't collide."""
+    tmp_path = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def write_json_atomic(path, data, **dump_kwargs):
+    write_atomic(path, json.dumps(data, ensure_ascii=False, **dump_kwargs))
+
+
+def retire_legacy_file(path):
+    """Renames an imported legacy file to *.migrated. Another process importing at the
+    same time may have moved it already, which is just as good."""
+    try:
+        os.replace(path, path + '.migrated')
+    except FileNotFoundError:
+        pass
@@ -1,18 +1,53 @@
+import hashlib
+import heapq
 import json
 import os
-import feedparser
-import pandas as pd
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
+from itertools import islice, takewhile
+from urllib.parse import urlparse
 import time
+from src.data_files import DATA_DIR, write_json_atomic
+from src.metrics import metrics
+from src.news_store import NewsStore, NEWS_RETENTION_DAYS
+from src.snapshot_cache import snapshot_cache
+from src.timestamps import entry_timestamp, require_timestamp, utc_isoformat
+from src.text_clean import clean_html, truncate
+from src.visitor_stats import get_visitor_counter
 
-DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
 FEEDS_FILE = os.path.join(DATA_DIR, 'feeds.json')
-NEWS_FILE = os.path.join(DATA_DIR, 'news.json')
-STATS_FILE = os.path.join(DATA_DIR, 'stats.json')
+NEWS_FILE = os.path.join(DATA_DIR, 'news.json')  # Legacy archive, imported into the SQLite store once
+STATS_FILE = os.path.join(DATA_DIR, 'stats.json')  # Legacy visitor count, imported into SQLite once
+FEED_STATE_FILE = os.path.join(DATA_DIR, 'feed_state.json')
+
+NEWS_SNAPSHOT_SIZE = 1000  # Newest items kept decoded in memory for all sessions
+NEWS_PAGE_SIZE = 30        # Items per page when browsing the archive
+
+# Concurrent fetch settings
+FETCH_MAX_WORKERS = 8         # Size of the shared download pool
+FETCH_PER_HOST_LIMIT = 2      # Max simultaneous requests to the same host
+FETCH_CONNECT_TIMEOUT = 5     # Seconds to establish a connection
+FETCH_READ_TIMEOUT = 15       # Seconds allowed to download one feed body
+FETCH_CYCLE_DEADLINE = 60     # Seconds for the whole fetch cycle
+FETCH_USER_AGENT = "Mozilla/5.0 (compatible; StockDashboardBot/1.0)"
+
+class NewsSnapshot(tuple):
+    """Newest stored items, newest first, plus the highest row id they were read up to"""
+    last_id = 0
+
 
 class DataManager:
     def __init__(self):
         self._ensure_files()
+        self.store = NewsStore()
+        if os.path.exists(NEWS_FILE):
+            self.store.import_json(NEWS_FILE)
+        self.visitors = get_visitor_counter()
+        if os.path.exists(STATS_FILE):
+            self.visitors.import_json(STATS_FILE)
 
     def _ensure_files(self):
         if not os.path.exists(DATA_DIR):
@@ -20,12 +55,24 @@ class DataManager:
         if not os.path.exists(FEEDS_FILE):
             with open(FEEDS_FILE, 'w', encoding='utf-8') as f:
                 json.dump([], f)
-        if not os.path.exists(NEWS_FILE):
-            with open(NEWS_FILE, 'w', encoding='utf-8') as f:
-                json.dump([], f)
-        if not os.path.exists(STATS_FILE):
-            with open(STATS_FILE, 'w', encoding='utf-8') as f:
-                json.dump({"visitors": 0}, f)
+
+    def load_fetch_state(self):
+        """Per-feed conditional GET validators and cumulative cache counters"""
+        try:
+            with open(FEED_STATE_FILE, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            state = {}
+        state.setdefault("feeds", {})
+        state.setdefault("totals", {"requests": 0, "not_modified": 0, "unchanged": 0, "bytes": 0})
+        return state
+
+    def get_fetch_cache_summary(self):
+        """Hit rate of the conditional GET / content hash cache"""
+        totals = self.load_fetch_state()["totals"]
+        hits = totals["not_modified"] + totals["unchanged"]
+        hit_rate = hits / totals["requests"] if totals["requests"] else 0.0
+        return dict(totals, hits=hits, hit_rate=hit_rate)
 
     def get_feeds(self):
         with open(FEEDS_FILE, 'r', encoding='utf-8') as f:
@@ -35,91 +82,357 @@ class DataManager:
         feeds = self.get_feeds()
         new_feed = {"name": name, "url": url, "category": category}
         feeds.append(new_feed)
-        with open(FEEDS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(feeds, f, indent=4, ensure_ascii=False)
+        write_json_atomic(FEEDS_FILE, feeds, indent=4)
         return True
 
     def remove_feed(self, url):
         feeds = self.get_feeds()
         feeds = [f for f in feeds if f['url'] != url]
-        with open(FEEDS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(feeds, f, indent=4, ensure_ascii=False)
+        write_json_atomic(FEEDS_FILE, feeds, indent=4)
         return True
 
-    def fetch_and_update_news(self):
-        from dateutil import parser as date_parser
-        
-        feeds = self.get_feeds()
-        existing_news = self.load_news()
-        existing_links = {item['link'] for item in existing_news}
+    def _download_feed(self, url, cached=None):
+        """Downloads a feed body with separate connect and read timeouts.
+        Sends conditional headers from `cached` and returns (status, body, headers)."""
+        headers = {"User-Agent": FETCH_USER_AGENT}
+        if cached:
+            if cached.get('etag'):
+                headers["If-None-Match"] = cached['etag']
+            if cached.get('last_modified'):
+                headers["If-Modified-Since"] = cached['last_modified']
+        request = urllib.request.Request(url, headers=headers)
+        # The socket timeout bounds the connect and every single read,
+        # the read deadline bounds the whole body download.
+        try:
+            response = urllib.request.urlopen(request, timeout=FETCH_CONNECT_TIMEOUT)
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return 304, b"", e.headers
+            raise
+        with response:
+            read_deadline = time.monotonic() + FETCH_READ_TIMEOUT
+            chunks = []
+            while True:
+                if time.monotonic() > read_deadline:
+                    raise TimeoutError(f"read timed out after {FETCH_READ_TIMEOUT}s")
+                chunk = response.read(64 * 1024)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            return response.status, b"".join(chunks), response.headers
+
+    def _fetch_feed(self, feed, host_limits, cached=None):
+        """Downloads and parses a single feed, respecting the per-host cap.
+        Parsing is skipped on a 304 or when the body hash matches the cached one."""
+        host = urlparse(feed['url']).netloc
+        result = {
+            'name': feed['name'],
+            'url': feed['url'],
+            'entries': [],
+            'latency': None,
+            'error': None,
+            'cache': None,   # 'not_modified' | 'unchanged' | None
+            'bytes': 0,
+            'state': None,   # Updated validators on success
+        }
+        with host_limits[host]:
+            started = time.monotonic()
+            try:
+                with metrics.timer("fetch_seconds", stage="download"):
+                    status, body, headers = self._download_feed(feed['url'], cached)
+                result['bytes'] = len(body)
+                state = dict(cached or {})
+                if status == 304:
+                    result['cache'] = 'not_modified'
+                else:
+                    content_hash = hashlib.sha1(body).hexdigest()
+                    state['etag'] = headers.get('ETag')
+                    state['last_modified'] = headers.get('Last-Modified')
+                    if content_hash == state.get('content_hash'):
+                        result['cache'] = 'unchanged'
+                    else:
+                        import feedparser
+                        with metrics.timer("fetch_seconds", stage="parse"):
+                            # The HTTP charset decides the encoding of feeds without an XML declaration
+                            parsed = feedparser.parse(
+                                body, response_headers={k.lower(): v for k, v in headers.items()}
+                            )
+                        result['entries'] = parsed.entries
+                        if not parsed.entries:
+                            result['error'] = "No entries"
+                        state['content_hash'] = content_hash
+                if not result['error']:
+                    state['last_success'] = datetime.now().isoformat()
+                    result['state'] = state
+            except Exception as e:
+                result['error'] = str(e)
+                metrics.inc("fetch_errors_total")
+            result['latency'] = round(time.monotonic() - started, 3)
+            if result['cache']:
+                metrics.inc("fetch_cache_hits_total", cache=result['cache'])
+        return result
+
+    def _fetch_all_feeds(self, feeds, fetch_state, max_workers=FETCH_MAX_WORKERS):
+        """Fetches all feeds on a bounded pool within the cycle deadline.
+        Results are returned in the same order as `feeds`."""
+        host_limits = {}
+        for feed in feeds:
+            host = urlparse(feed['url']).netloc
+            if host not in host_limits:
+                host_limits[host] = threading.BoundedSemaphore(FETCH_PER_HOST_LIMIT)
+
+        executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="feed-fetch")
+        futures = [
+            executor.submit(self._fetch_feed, feed, host_limits, fetch_state["feeds"].get(feed['url']))
+            for feed in feeds
+        ]
+        done, _ = wait(futures, timeout=FETCH_CYCLE_DEADLINE)
+        # Don't block on stragglers: they finish in the background and are dropped
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        results = []
+        for feed, future in zip(feeds, futures):
+            if future in done:
+                results.append(future.result())
+            else:
+                results.append({
+                    'name': feed['name'],
+                    'url': feed['url'],
+                    'entries': [],
+                    'latency': None,
+                    'error': f"Cycle deadline ({FETCH_CYCLE_DEADLINE}s) exceeded",
+                    'cache': None,
+                    'bytes': 0,
+                    'state': None,
+                })
+        return results
+
+    def fetch_and_update_news(self, feeds=None, max_workers=FETCH_MAX_WORKERS):
+        """Fetches the given feeds (default: all) concurrently and stores the new items.
+        Returns (new item count, per-feed stats). Pass max_workers=1 to fetch serially."""
+        if feeds is None:
+            feeds = self.get_feeds()
+        results = self.fetch_feeds(feeds, max_workers)
+        return self.store_fetch_results(feeds, results)
+
+    def fetch_feeds(self, feeds, max_workers=FETCH_MAX_WORKERS):
+        """Network half of a fetch: downloads and parses the feeds, stores nothing.
+        Returns one result per feed, in order, for store_fetch_results."""
+        return self._fetch_all_feeds(feeds, self.load_fetch_state(), max_workers)
+
+    def store_fetch_results(self, feeds, results):
+        """Storage half of a fetch: normalises dates, cleans summary HTML, drops known links
+        and stores the rest (clustered on insert), then saves the feeds' validators.
+        Returns (new item count, per-feed stats)."""
+        merge_started = time.perf_counter()
+        fetch_state = self.load_fetch_state()
+        totals = fetch_state["totals"]
         
         new_items = []
-        for feed in feeds:
+        feed_stats = []
+        # Items past the retention window would just be purged again on this cycle
+        now_ts = int(time.time())
+        retention_cutoff = now_ts - NEWS_RETENTION_DAYS * 86400
+        # Only links the store hasn't seen count as new (indexed lookup, no full load)
+        unseen_links = self.store.filter_new_links(
+            {entry.link for result in results for entry in result['entries'] if entry.get('link')}
+        )
+        # Merge in feeds.json order so link dedup keeps the same winner as before
+        for feed, result in zip(feeds, results):
+            added = 0
+            if result['latency'] is not None:
+                totals["requests"] += 1
+                totals["bytes"] += result['bytes']
+                if result['cache']:
+                    totals[result['cache']] += 1
             try:
-                parsed = feedparser.parse(feed['url'])
-                if not parsed.entries:
-                    print(f"Warning: No entries for {feed['name']}")
-                    continue
+                if result['error']:
+                    print(f"Error fetching {feed['url']}: {result['error']}")
                     
-                for entry in parsed.entries:
-                    if entry.link not in existing_links:
-                        # Attempt to parse date
-                        raw_date = entry.get('published', datetime.now().isoformat())
-                        try:
-                            dt = date_parser.parse(raw_date)
-                            # Convert to naive or UTC to avoid mixing offset-aware/naive
-                            published_iso = dt.isoformat()
-                        except:
-                            published_iso = datetime.now().isoformat()
+                for entry in result['entries']:
+                    if entry.get('link') in unseen_links:
+                        # UTC epoch from feedparser's parsed struct, or now if the entry has no date
+                        published_ts = entry_timestamp(entry)
+                        if published_ts is None:
+                            published_ts = now_ts
+                        if published_ts < retention_cutoff:
+                            continue
                         
+                        # Plain text once here instead of tag-mangling on every render
+                        summary = clean_html(entry.get('summary', ''))
                         item = {
                             'title': entry.title,
                             'link': entry.link,
-                            'summary': entry.get('summary', ''),
-                            'published': published_iso,
+                            'summary': summary,
+                            'snippet': truncate(summary),
+                            'published': utc_isoformat(published_ts),
+                            'published_ts': published_ts,
                             'source': feed['name'],
                             'category': feed['category'],
                             'fetched_at': datetime.now().isoformat()
                         }
                         new_items.append(item)
-                        existing_links.add(entry.link)
+                        unseen_links.discard(entry.link)
+                        added += 1
             except Exception as e:
-                print(f"Error fetching {feed['url']}: {e}")
-        
-        # Combine
-        all_news = new_items + existing_news
+                print(f"Error processing {feed['url']}: {e}")
+                result['error'] = str(e)
+            else:
+                # Only once the entries are merged: after a failure the old content hash
+                # stays, so the next poll parses this body again instead of skipping it
+                if result['state']:
+                    fetch_state["feeds"][feed['url']] = result['state']
+
+            feed_stats.append({
+                'name': result['name'],
+                'url': result['url'],
+                'latency': result['latency'],
+                'entries': len(result['entries']),
+                'new': added,
+                'cache': result['cache'],
+                'bytes': result['bytes'],
+                'error': result['error'],
+            })
+
+        metrics.observe("fetch_seconds", time.perf_counter() - merge_started, stage="merge")
+
+        with metrics.timer("fetch_seconds", stage="write"):
+            if new_items:
+                self.store.insert_many(new_items)
+            self.store.purge_older_than(NEWS_RETENTION_DAYS)
+
+            # Saved after the news so a failed write doesn't mark unseen items as cached
+            feed_urls = {feed['url'] for feed in self.get_feeds()}
+            fetch_state["feeds"] = {url: v for url, v in fetch_state["feeds"].items() if url in feed_urls}
+            write_json_atomic(FEED_STATE_FILE, fetch_state, indent=4)
+        metrics.inc("news_items_stored_total", len(new_items))
         
-        # Sort by 'published' date descending
+        return len(new_items), feed_stats
+
+    def load_news(self, limit=None, offset=0, since=None):
+        """Stored news, newest first. `since` is a lower bound on the publish time (epoch,
+        datetime or ISO string); a value that isn't one raises ValueError. Served from the
+        shared in-memory snapshot when it covers the request."""
+        since_ts = None if since is None else require_timestamp(since)
+        started = time.perf_counter()
         try:
-            all_news.sort(key=lambda x: x.get('published', ''), reverse=True)
-        except:
-             pass # Fallback if sorting fails
-             
-        # Keep only last 30 days or max 1000 items
-        all_news = all_news[:1000]
-        
-        with open(NEWS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(all_news, f, indent=4, ensure_ascii=False)
-        
-        return len(new_items)
+            snapshot = self._news_snapshot()
+            complete = len(snapshot) < NEWS_SNAPSHOT_SIZE  # Snapshot holds the whole archive
+            if since is None:
+                if complete or (limit is not None and offset + limit <= len(snapshot)):
+                    news = list(snapshot[offset:offset + limit if limit is not None else None])
+                    metrics.observe("news_load_seconds", time.perf_counter() - started, source="snapshot")
+                    return news
+            else:
+                if complete or (snapshot and snapshot[-1].published_ts < since_ts):
+                    # Newest first, so the range is a prefix
+                    matched = list(takewhile(lambda item: item.published_ts >= since_ts, snapshot))
+                    metrics.observe("news_load_seconds", time.perf_counter() - started, source="snapshot")
+                    return matched[offset:offset + limit if limit is not None else None]
+            news = self.store.load(limit=limit, offset=offset, since=since_ts)
+            metrics.observe("news_load_seconds", time.perf_counter() - started, source="store")
+            return news
+        except Exception as e:
+            print(f"Error loading news: {e}")
+            return []
+
+    def _news_snapshot(self):
+        return snapshot_cache.get(
+            "news", self.store.version(), self._load_news_snapshot, update=self._merge_news_snapshot
+        )
+
+    def _load_news_snapshot(self):
+        with metrics.timer("snapshot_decode_seconds", key="news"):
+            items, last_id = self.store.newest(NEWS_SNAPSHOT_SIZE)
+            snapshot = NewsSnapshot(items)
+            snapshot.last_id = last_id
+            return snapshot
 
-    def load_news(self):
+    def _merge_news_snapshot(self, previous):
+        """Refreshes a stale snapshot with only the rows added since it was read: both runs
+        are already newest first, so a linear merge replaces reloading and re-sorting."""
+        with metrics.timer("snapshot_decode_seconds", key="news_merge"):
+            added, last_id = self.store.newest(NEWS_SNAPSHOT_SIZE, after_id=previous.last_id)
+            purged_before = self.store.purged_before()
+            # New rows go first so equal timestamps keep the store's newest-id-first order
+            merged = heapq.merge(added, previous, key=lambda item: item.published_ts, reverse=True)
+            # Whatever retention deleted is older than anything kept, so the result is still
+            # the newest NEWS_SNAPSHOT_SIZE rows (and complete if it comes up short)
+            snapshot = NewsSnapshot(islice(
+                (item for item in merged if item.published_ts >= purged_before), NEWS_SNAPSHOT_SIZE
+            ))
+            snapshot.last_id = last_id
+            return snapshot
+
+    def browse_news(self, cursor=None, limit=NEWS_PAGE_SIZE, **filters):
+        """One page of news matching the source/category/date filters, newest first.
+        Returns (items, next_cursor); pass next_cursor back for the following page."""
         try:
-            with open(NEWS_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
+            with metrics.timer("news_page_seconds"):
+                return self.store.page(limit=limit, cursor=cursor, **filters)
+        except Exception as e:
+            print(f"Error browsing news: {e}")
+            return [], None
+
+    def news_last_id(self):
+        """Marker for count_new_news: the newest item stored so far"""
+        try:
+            return self.store.last_id()
+        except Exception as e:
+            print(f"Error reading news id: {e}")
+            return 0
+
+    def count_new_news(self, after_id, **filters):
+        """Items matching the filters stored since news_last_id returned `after_id`"""
+        try:
+            return self.store.count_added(after_id, **filters)
+        except Exception as e:
+            print(f"Error counting new news: {e}")
+            return 0
+
+    def news_facets(self, sources=None, categories=None, since=None, until=None):
+        """Item counts per source and per category for the current filters.
+        Each facet is counted with the other filters applied but not its own, so the
+        counts say what picking one more value would add. Dates are ISO days, `until` exclusive."""
+        rows = snapshot_cache.get("news_facets", self.store.version(), lambda: tuple(self.store.facet_rows()))
+        source_counts, category_counts = {}, {}
+        total = 0
+        first_day = None
+        for day, source, category, count in rows:
+            if day and (first_day is None or day < first_day):
+                first_day = day
+            # Every value stays listed, at 0 when filtered out, so selections never vanish
+            source_counts.setdefault(source, 0)
+            category_counts.setdefault(category, 0)
+            if (since and day < since) or (until and day >= until):
+                continue
+            source_match = not sources or source in sources
+            category_match = not categories or category in categories
+            if category_match:
+                source_counts[source] = source_counts.get(source, 0) + count
+            if source_match:
+                category_counts[category] = category_counts.get(category, 0) + count
+            if source_match and category_match:
+                total += count
+        return {"sources": source_counts, "categories": category_counts, "total": total, "first_day": first_day}
+
+    def search_news(self, query, limit=20, **filters):
+        """Full-text search over the whole archive, best match first"""
+        try:
+            with metrics.timer("news_search_seconds"):
+                return self.store.search(query, limit=limit, **filters)
+        except Exception as e:
+            print(f"Error searching news: {e}")
             return []
 
     def load_stats(self):
-        try:
-            with open(STATS_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return {"visitors": 0}
+        """O(1): served from the in-memory visitor counter"""
+        return {"visitors": self.visitors.total()}
+
+    def load_visit_series(self, granularity="hour", limit=48):
+        """Visits per hour/day bucket, oldest first"""
+        return self.visitors.buckets(granularity, limit)
 
     def increment_visitor_count(self):
-        stats = self.load_stats()
-        stats["visitors"] += 1
-        with open(STATS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(stats, f)
-        return stats["visitors"]
+        # In-memory only; flushed to the database in batches by the counter
+        return self.visitors.increment()
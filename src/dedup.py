@@ -0,0 +1,135 @@
+import hashlib
+import re
+import struct
+import unicodedata
+from src.search_index import tokenize
+
+# MinHash signatures split into LSH bands. Stories sharing a band value become
+# candidates; only those are compared, so the cost per new item doesn't grow with
+# the archive. With 10 bands of 3 rows, pairs at 0.8 Jaccard similarity are found
+# >99% of the time while unrelated headlines (~0.05) almost never collide.
+MINHASH_PERMUTATIONS = 30
+BAND_ROWS = 3
+# Short headlines give few shingles, so "기준금리 동결" and "기준금리 인하" already share
+# most of them: a join needs high exact Jaccard similarity, not just the MinHash estimate.
+NEAR_DUPLICATE_SIMILARITY = 0.8
+# 30 permutations estimate within ~0.15; below this the exact check is skipped
+CANDIDATE_SIMILARITY = 0.6
+SUMMARY_CHARS = 80  # Only the lead of the summary; outlets append different boilerplate
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+# Fixed coefficients so signatures stay comparable across processes and restarts
+_PERMUTATIONS = [
+    (int.from_bytes(hashlib.blake2b(f"a{i}".encode(), digest_size=8).digest(), 'big') % _MERSENNE_PRIME | 1,
+     int.from_bytes(hashlib.blake2b(f"b{i}".encode(), digest_size=8).digest(), 'big') % _MERSENNE_PRIME)
+    for i in range(MINHASH_PERMUTATIONS)
+]
+_SIGNATURE_FORMAT = f">{MINHASH_PERMUTATIONS}I"
+
+# "제목 - 한국경제", "제목 | 매일경제" (Google News appends the outlet), "[속보] 제목"
+_OUTLET_SUFFIX_RE = re.compile(r'\s+[-|–]\s+[^-|–]{1,30}$')
+_TAG_PREFIX_RE = re.compile(r'^\s*[\[【(][^\]】)]{1,10}[\]】)]\s*')
+_WORD_RE = re.compile(r'\w+')
+_NUMBER_RE = re.compile(r'\d+(?:[.,]\d+)*')
+
+
+def _normalize_title(title):
+    title = _OUTLET_SUFFIX_RE.sub('', title or '')
+    return _TAG_PREFIX_RE.sub('', title)
+
+
+def shingles(title, summary=''):
+    summary = re.sub(r'<[^>]+>', ' ', summary or '')
+    return set(tokenize(_normalize_title(title))) | set(tokenize(summary[:SUMMARY_CHARS]))
+
+
+def jaccard(a, b):
+    """Exact Jaccard similarity of two shingle sets"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _title_words(title):
+    return set(_WORD_RE.findall(unicodedata.normalize('NFKC', _normalize_title(title)).lower()))
+
+
+def conflicting_titles(title_a, title_b):
+    """True when two similar headlines report different facts: their numbers differ
+    ("10조" vs "12조") or one word is swapped for another ("동결" vs "인하",
+    "삼성전자" vs "SK하이닉스"). Extra words or a longer form of the same word
+    ("10조" vs "10조원", "코스피" vs "코스피가") don't count."""
+    numbers_a = set(_NUMBER_RE.findall(unicodedata.normalize('NFKC', title_a or '')))
+    numbers_b = set(_NUMBER_RE.findall(unicodedata.normalize('NFKC', title_b or '')))
+    if numbers_a and numbers_b and numbers_a != numbers_b:
+        return True
+    words_a, words_b = _title_words(title_a), _title_words(title_b)
+    only_a = {w for w in words_a - words_b if not any(w.startswith(o) or o.startswith(w) for o in words_b - words_a)}
+    only_b = {w for w in words_b - words_a if not any(w.startswith(o) or o.startswith(w) for o in words_a - words_b)}
+    return bool(only_a) and bool(only_b)
+
+
+def is_near_duplicate(title_a, summary_a, title_b, summary_b):
+    """Exact check behind a MinHash candidate: same wording and no conflicting facts"""
+    if jaccard(shingles(title_a, summary_a), shingles(title_b, summary_b)) < NEAR_DUPLICATE_SIMILARITY:
+        return False
+    return not conflicting_titles(title_a, title_b)
+
+
+def minhash(title, summary=''):
+    """MinHash signature (tuple of ints) of the story's shingles, None if it has none"""
+    tokens = shingles(title, summary)
+    if not tokens:
+        return None
+    hashes = [int.from_bytes(hashlib.blake2b(t.encode('utf-8'), digest_size=8).digest(), 'big') for t in tokens]
+    return tuple(
+        min((a * h + b) % _MERSENNE_PRIME for h in hashes) & _MAX_HASH
+        for a, b in _PERMUTATIONS
+    )
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+def band_values(signature):
+    """[(band index, bucket value)] used as LSH keys (signed 64-bit for SQLite)"""
+    bands = []
+    for band, start in enumerate(range(0, len(signature), BAND_ROWS)):
+        rows = signature[start:start + BAND_ROWS]
+        digest = hashlib.blake2b(struct.pack(f">{len(rows)}I", *rows), digest_size=8).digest()
+        bands.append((band, int.from_bytes(digest, 'big', signed=True)))
+    return bands
+
+
+def pack_signature(signature):
+    return struct.pack(_SIGNATURE_FORMAT, *signature)
+
+
+def unpack_signature(blob):
+    return struct.unpack(_SIGNATURE_FORMAT, blob)
+
+
+def group_clusters(items):
+    """Groups items by story cluster, keeping the input order of first appearance.
+    Returns [(representative, members)]; the representative is the first member."""
+    groups = {}
+    order = []
+    for item in items:
+        key = item.get('cluster_id') or item['link']
+        if key not in groups:
+            groups[key] = []
+            order.append(key)
+        groups[key].append(item)
+    return [(groups[key][0], groups[key]) for key in order]
+
+
+def source_names(members):
+    """Distinct outlets in a cluster, in order"""
+    names = []
+    for item in members:
+        if item['source'] not in names:
+            names.append(item['source'])
+    return names
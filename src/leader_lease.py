@@ -0,0 +1,77 @@
+import json
+import os
+import socket
+import time
+import uuid
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from src.data_files import DATA_DIR, write_json_atomic
+
+LEASE_FILE = os.path.join(DATA_DIR, 'worker.lease')
+LEASE_TTL = 30  # seconds without a heartbeat before another worker may take over
+
+
+class LeaderLease:
+    """Time-limited leadership recorded in a file in the shared data directory.
+    Every read-modify-write happens under an OS file lock, so two contenders can never
+    both see the lease as free. The holder renews it with heartbeats; if it stops
+    (crash, hang, lost host) the lease expires after `ttl` and a standby takes over."""
+
+    def __init__(self, path=LEASE_FILE, ttl=LEASE_TTL, owner=None):
+        self.path = path
+        self.ttl = ttl
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+    @contextmanager
+    def _locked(self):
+        with open(self.path + '.lock', 'a+b') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _read(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def try_acquire(self):
+        """Takes the lease if it is free or expired, renews it if we hold it.
+        Returns True while we are the leader."""
+        now = time.time()
+        with self._locked():
+            lease = self._read()
+            if lease and lease.get('owner') != self.owner and now - lease.get('heartbeat_at', 0) < self.ttl:
+                return False
+            acquired_at = lease['acquired_at'] if lease and lease.get('owner') == self.owner else now
+            write_json_atomic(self.path, {
+                "owner": self.owner,
+                "acquired_at": acquired_at,
+                "heartbeat_at": now,
+                "ttl": self.ttl,
+            })
+            return True
+
+    def release(self):
+        """Gives the lease up right away so a standby doesn't wait for it to expire"""
+        with self._locked():
+            lease = self._read()
+            if lease and lease.get('owner') == self.owner:
+                os.remove(self.path)
@@ -0,0 +1,143 @@
+import bisect
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from src.data_files import DATA_DIR, write_atomic
+
+# Prometheus text format, e.g. for node_exporter's textfile collector
+METRICS_FILE = os.path.join(DATA_DIR, 'metrics.prom')
+
+METRICS_WINDOW = 1000  # Recent samples kept per series for percentiles
+METRIC_PREFIX = "dashboard_"
+
+# Cumulative export buckets
+TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(round(q / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+class Histogram:
+    """Ring buffer of recent samples (for percentiles) plus all-time bucket counts (for export)"""
+
+    def __init__(self, buckets=TIME_BUCKETS, window=METRICS_WINDOW):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)  # Last one is +Inf
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.sum += value
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+
+
+class MetricsRegistry:
+    """In-process histograms and counters keyed by (name, labels)"""
+
+    def __init__(self):
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name, labels):
+        return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+    def observe(self, name, value, buckets=TIME_BUCKETS, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observes the block's wall time in seconds (also when it raises)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def inc(self, name, amount=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def summary(self):
+        """One row per histogram series with p50/p95/p99 over the recent window"""
+        with self._lock:
+            series = [(key, sorted(h.samples), h.count, h.sum) for key, h in self._histograms.items()]
+        rows = []
+        for (name, labels), samples, count, total in sorted(series):
+            rows.append({
+                "name": name,
+                "labels": ", ".join(f"{k}={v}" for k, v in labels),
+                "count": count,
+                "mean": total / count if count else None,
+                "p50": percentile(samples, 50),
+                "p95": percentile(samples, 95),
+                "p99": percentile(samples, 99),
+            })
+        return rows
+
+    def counters(self):
+        with self._lock:
+            items = sorted(self._counters.items())
+        return [
+            {"name": name, "labels": ", ".join(f"{k}={v}" for k, v in labels), "value": value}
+            for (name, labels), value in items
+        ]
+
+    def to_prometheus(self):
+        """Prometheus text exposition format (histograms are all-time, not windowed)"""
+        def label_text(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            escaped = ('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in pairs)
+            return "{" + ",".join(escaped) + "}"
+
+        with self._lock:
+            histograms = [(key, h.buckets, list(h.bucket_counts), h.count, h.sum) for key, h in self._histograms.items()]
+            counters = list(self._counters.items())
+
+        lines = []
+        typed = set()
+        for (name, labels), bounds, bucket_counts, count, total in sorted(histograms):
+            metric = METRIC_PREFIX + name
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} histogram")
+                typed.add(metric)
+            cumulative = 0
+            for bound, bucket_count in zip(list(bounds) + ["+Inf"], bucket_counts):
+                cumulative += bucket_count
+                lines.append(f"{metric}_bucket{label_text(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{metric}_sum{label_text(labels)} {total}")
+            lines.append(f"{metric}_count{label_text(labels)} {count}")
+        for (name, labels), value in sorted(counters):
+            metric = METRIC_PREFIX + name
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f"{metric}{label_text(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path=METRICS_FILE):
+        """Atomic write, so a scraper never reads half a file"""
+        write_atomic(path, self.to_prometheus())
+
+
+metrics = MetricsRegistry()
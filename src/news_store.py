@@ -0,0 +1,518 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from src.data_files import DATA_DIR, retire_legacy_file
+from src.timestamps import to_timestamp, require_timestamp, utc_isoformat
+from src.text_clean import clean_html, truncate
+from src.search_index import index_text, build_match_query
+from src.dedup import (minhash, band_values, similarity, is_near_duplicate, pack_signature, unpack_signature,
+                       CANDIDATE_SIMILARITY)
+
+DB_FILE = os.path.join(DATA_DIR, 'dashboard.db')
+
+NEWS_RETENTION_DAYS = 30
+SEARCH_RECENCY_DAYS = 7  # A week-old match needs twice the relevance of a fresh one
+SEARCH_CANDIDATES = 2000
+# Bumped when the near-duplicate rule changes, so stored clusters are rebuilt with it
+CLUSTER_RULE_VERSION = 2
+# summary: plain text cleaned at ingest (capped); snippet: its display-length cut
+# published: UTC ISO string for display; published_ts: UTC epoch seconds, the sort key
+NEWS_COLUMNS = ('title', 'link', 'summary', 'snippet', 'published', 'published_ts', 'source', 'category', 'fetched_at')
+# Columns handed out to readers; cluster_id is assigned by the store at insert time
+RECORD_COLUMNS = NEWS_COLUMNS + ('cluster_id',)
+
+class NewsRecord(namedtuple('NewsRecord', RECORD_COLUMNS)):
+    """Immutable, compact news item (no per-instance dict) that still reads like the
+    dicts the app used to pass around: item['title'], item.get('summary')."""
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key)
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def keys(self):
+        return self._fields
+
+    def to_dict(self):
+        return self._asdict()
+
+
+# One connection per thread and database file (sqlite3 connections can't be shared across threads)
+_local = threading.local()
+_schema_lock = threading.Lock()
+_initialized_paths = set()
+
+
+def _facet_key(row):
+    """SQL for the (local day, source, category) facet bucket of a news row"""
+    return (f"IFNULL(date({row}.published_ts, 'unixepoch', 'localtime'), ''), "
+            f"IFNULL({row}.source, ''), IFNULL({row}.category, '')")
+
+
+def _filter_clause(sources=None, categories=None, since=None, until=None, prefix=''):
+    """WHERE terms and params for the browsing filters. `since`/`until` are anything
+    to_timestamp takes (a day means local midnight), `until` exclusive; empty
+    source/category lists mean no restriction."""
+    terms, params = [], []
+    for column, values in (('source', sources), ('category', categories)):
+        if values:
+            terms.append(f"{prefix}{column} IN ({','.join('?' * len(values))})")
+            params.extend(values)
+    for op, bound in (('>=', since), ('<', until)):
+        if bound is not None:
+            terms.append(f"{prefix}published_ts {op} ?")
+            params.append(to_timestamp(bound))
+    return terms, params
+
+
+def get_connection(db_path=DB_FILE):
+    conns = getattr(_local, 'conns', None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        # WAL lets the UI read while the scheduler writes; readers see the last committed state
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conns[db_path] = conn
+    return conn
+
+
+def claim_migration(conn, name):
+    """Opens a write transaction on `conn` and records the one-time migration `name` in it.
+    Returns False if it is already recorded. The transaction takes SQLite's write lock, so
+    concurrent importers (threads or processes) run one at a time and only the first one
+    claims it; the record commits or rolls back together with the imported rows."""
+    conn.execute("BEGIN IMMEDIATE")
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+    cur = conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)",
+                       (f"migrated:{name}", int(time.time())))
+    return bool(cur.rowcount)
+
+
+class NewsStore:
+    """SQLite-backed news archive. Inserts only touch new rows and retention is an indexed delete."""
+
+    fts_enabled = True
+
+    def __init__(self, db_path=DB_FILE):
+        self.db_path = db_path
+        with _schema_lock:
+            if db_path not in _initialized_paths:
+                self._init_schema()
+                _initialized_paths.add(db_path)
+
+    @property
+    def conn(self):
+        return get_connection(self.db_path)
+
+    def _init_schema(self):
+        with self.conn as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS news (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    title TEXT NOT NULL,
+                    link TEXT NOT NULL,
+                    summary TEXT,
+                    published TEXT,
+                    source TEXT,
+                    category TEXT,
+                    fetched_at TEXT
+                )
+            """)
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_news_link ON news(link)")
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(news)")}
+            if 'published_ts' not in columns:
+                self._migrate_published_ts(conn)
+            cleaned_summaries = 'snippet' not in columns
+            if cleaned_summaries:
+                self._migrate_clean_summaries(conn)
+            # Ordering, retention and date ranges all run on the epoch column
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_news_published_ts ON news(published_ts)")
+            # Filtered browsing walks these newest first, one page at a time
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_news_source_ts ON news(source, published_ts)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_news_category_ts ON news(category, published_ts)")
+            # Version counter bumped by every write, so readers can cheaply tell if their snapshot is stale
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('news_version', 0)")
+
+            # Near-duplicate story clustering: MinHash signature per item + LSH band buckets
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(news)")}
+            added_cluster_columns = 'cluster_id' not in columns
+            if added_cluster_columns:
+                conn.execute("ALTER TABLE news ADD COLUMN minhash BLOB")
+                conn.execute("ALTER TABLE news ADD COLUMN cluster_id INTEGER")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_news_cluster ON news(cluster_id)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS news_bands (
+                    band INTEGER NOT NULL,
+                    value INTEGER NOT NULL,
+                    news_id INTEGER NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_news_bands ON news_bands(band, value)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_news_bands_news ON news_bands(news_id)")
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS news_bands_delete AFTER DELETE ON news BEGIN
+                    DELETE FROM news_bands WHERE news_id = old.id;
+                END
+            """)
+
+            # Facet counts per (day, source, category), kept current by triggers so the
+            # filter counts never have to scan the archive
+            facets_exist = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'news_facets'").fetchone()
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS news_facets (
+                    day TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    category TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (day, source, category)
+                ) WITHOUT ROWID
+            """)
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS news_facets_insert AFTER INSERT ON news BEGIN
+                    INSERT INTO news_facets (day, source, category, count)
+                    VALUES ({_facet_key('new')}, 1)
+                    ON CONFLICT (day, source, category) DO UPDATE SET count = count + 1;
+                END
+            """)
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS news_facets_delete AFTER DELETE ON news BEGIN
+                    UPDATE news_facets SET count = count - 1
+                    WHERE (day, source, category) = ({_facet_key('old')});
+                    DELETE FROM news_facets WHERE count <= 0;
+                END
+            """)
+            if not facets_exist:
+                conn.execute(f"""
+                    INSERT INTO news_facets (day, source, category, count)
+                    SELECT {_facet_key('news')}, COUNT(*) FROM news GROUP BY 1, 2, 3
+                """)
+
+            row = conn.execute("SELECT value FROM meta WHERE key = 'cluster_rule'").fetchone()
+            if added_cluster_columns or (row[0] if row else 1) < CLUSTER_RULE_VERSION:
+                # Oldest first so earlier stories become the cluster roots
+                conn.execute("DELETE FROM news_bands")
+                conn.execute("UPDATE news SET minhash = NULL, cluster_id = NULL")
+                rows = conn.execute("SELECT id, title, summary FROM news ORDER BY id").fetchall()
+                for row in rows:
+                    self._assign_cluster(conn, row['id'], row['title'], row['summary'])
+                if rows and not added_cluster_columns:
+                    print(f"Re-clustered {len(rows)} news items")
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('cluster_rule', ?)",
+                             (CLUSTER_RULE_VERSION,))
+
+        # Full-text index over pre-tokenized (bigram) title/summary, rowid = news.id
+        try:
+            with self.conn as conn:
+                exists = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'news_fts'"
+                ).fetchone()
+                conn.execute("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS news_fts
+                    USING fts5(title, summary, tokenize = 'unicode61 remove_diacritics 0')
+                """)
+                conn.execute("""
+                    CREATE TRIGGER IF NOT EXISTS news_fts_delete AFTER DELETE ON news BEGIN
+                        DELETE FROM news_fts WHERE rowid = old.id;
+                    END
+                """)
+                if not exists or cleaned_summaries:
+                    self._rebuild_search_index(conn)
+        except sqlite3.OperationalError as e:
+            # SQLite built without FTS5: search falls back to a LIKE scan
+            print(f"FTS5 unavailable, using plain search: {e}")
+            NewsStore.fts_enabled = False
+
+    def _migrate_published_ts(self, conn):
+        """Adds the epoch sort key. `published` used to hold whatever offset (or none) the
+        feed used, so text order mixed up KST and UTC items; both columns are rewritten."""
+        conn.execute("ALTER TABLE news ADD COLUMN published_ts INTEGER")
+        rows = conn.execute("SELECT id, published, fetched_at FROM news").fetchall()
+        updates = []
+        now = int(time.time())
+        for row in rows:
+            ts = None
+            for value in (row['published'], row['fetched_at']):
+                if ts is None and value:
+                    ts = to_timestamp(value)
+            ts = now if ts is None else ts
+            updates.append((ts, utc_isoformat(ts), row['id']))
+        conn.executemany("UPDATE news SET published_ts = ?, published = ? WHERE id = ?", updates)
+        # Indexes and facet buckets keyed on the old text column are rebuilt on the new one
+        for index in ('idx_news_published', 'idx_news_source_published', 'idx_news_category_published'):
+            conn.execute(f"DROP INDEX IF EXISTS {index}")
+        conn.execute("DROP TRIGGER IF EXISTS news_facets_insert")
+        conn.execute("DROP TRIGGER IF EXISTS news_facets_delete")
+        conn.execute("DROP TABLE IF EXISTS news_facets")
+        if rows:
+            print(f"Added published_ts to {len(rows)} news items")
+
+    def _migrate_clean_summaries(self, conn):
+        """Adds the display snippet and replaces raw feed HTML in stored summaries with
+        cleaned text, as new items get at ingest"""
+        conn.execute("ALTER TABLE news ADD COLUMN snippet TEXT")
+        updates = []
+        for row in conn.execute("SELECT id, summary FROM news").fetchall():
+            summary = clean_html(row['summary'])
+            updates.append((summary, truncate(summary), row['id']))
+        conn.executemany("UPDATE news SET summary = ?, snippet = ? WHERE id = ?", updates)
+        if updates:
+            print(f"Cleaned the summaries of {len(updates)} news items")
+
+    def _rebuild_search_index(self, conn):
+        conn.execute("DELETE FROM news_fts")
+        for row in conn.execute("SELECT id, title, summary FROM news").fetchall():
+            conn.execute(
+                "INSERT INTO news_fts (rowid, title, summary) VALUES (?, ?, ?)",
+                (row['id'], index_text(row['title']), index_text(row['summary']))
+            )
+
+    def import_json(self, json_path):
+        """One-time migration of the legacy news.json archive. Several processes may start
+        at once; only the first to claim it imports and later starts skip it."""
+        if not os.path.exists(json_path):
+            return 0
+        items = []
+        with self.conn as conn:
+            claimed = claim_migration(conn, 'news.json')
+            if claimed:
+                try:
+                    with open(json_path, 'r', encoding='utf-8') as f:
+                        items = json.load(f)
+                except (OSError, json.JSONDecodeError):
+                    pass
+            count = self._insert_items(conn, items)
+        retire_legacy_file(json_path)
+        if claimed:
+            print(f"Migrated {count} news items from {json_path}")
+        return count
+
+    def filter_new_links(self, links):
+        """Returns the subset of `links` that are not stored yet"""
+        links = list(links)
+        existing = set()
+        # Stay under SQLite's bound-parameter limit
+        for i in range(0, len(links), 500):
+            chunk = links[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(f"SELECT link FROM news WHERE link IN ({placeholders})", chunk)
+            existing.update(row[0] for row in rows)
+        return {link for link in links if link not in existing}
+
+    def insert_many(self, items):
+        """Inserts items, silently skipping links that already exist. Returns the inserted count.
+        New rows are added to the search index in the same transaction."""
+        if not items:
+            return 0
+        with self.conn as conn:
+            return self._insert_items(conn, items)
+
+    def _insert_items(self, conn, items):
+        items = [item for item in items if item.get('link')]
+        sql = f"INSERT OR IGNORE INTO news ({', '.join(NEWS_COLUMNS)}) VALUES ({', '.join('?' * len(NEWS_COLUMNS))})"
+        inserted = 0
+        for item in items:
+            # Legacy archive items only carry the raw date string and summary HTML
+            if item.get('published_ts') is None:
+                ts = (item.get('published') and to_timestamp(item['published'])) or int(time.time())
+                item = dict(item, published_ts=ts, published=utc_isoformat(ts))
+            if item.get('snippet') is None:
+                summary = clean_html(item.get('summary'))
+                item = dict(item, summary=summary, snippet=truncate(summary))
+            cur = conn.execute(sql, tuple(item.get(col) for col in NEWS_COLUMNS))
+            if not cur.rowcount:
+                continue
+            inserted += 1
+            self._assign_cluster(conn, cur.lastrowid, item.get('title'), item.get('summary'))
+            if self.fts_enabled:
+                conn.execute(
+                    "INSERT INTO news_fts (rowid, title, summary) VALUES (?, ?, ?)",
+                    (cur.lastrowid, index_text(item.get('title')), index_text(item.get('summary')))
+                )
+        if inserted:
+            self._bump_version(conn)
+        return inserted
+
+    def _assign_cluster(self, conn, news_id, title, summary):
+        """Joins the most similar near-duplicate's cluster, or starts a new one rooted at this item.
+        Only items sharing an LSH band value are compared, so cost doesn't grow with the archive;
+        those close enough by MinHash estimate get the exact check (see is_near_duplicate)."""
+        signature = minhash(title, summary)
+        if signature is None:
+            conn.execute("UPDATE news SET cluster_id = ? WHERE id = ?", (news_id, news_id))
+            return news_id
+
+        bands = band_values(signature)
+        where = " OR ".join("(b.band = ? AND b.value = ?)" for _ in bands)
+        params = [v for band in bands for v in band]
+        candidates = conn.execute(f"""
+            SELECT DISTINCT n.id, n.minhash, n.cluster_id, n.title, n.summary
+            FROM news_bands b JOIN news n ON n.id = b.news_id
+            WHERE ({where}) AND n.id != ?
+        """, params + [news_id]).fetchall()
+
+        cluster_id = news_id
+        best = CANDIDATE_SIMILARITY
+        for row in candidates:
+            if row['minhash'] is None:
+                continue
+            score = similarity(signature, unpack_signature(row['minhash']))
+            if score >= best and is_near_duplicate(title, summary, row['title'], row['summary']):
+                best = score
+                cluster_id = row['cluster_id'] or row['id']
+
+        conn.execute(
+            "UPDATE news SET minhash = ?, cluster_id = ? WHERE id = ?",
+            (pack_signature(signature), cluster_id, news_id)
+        )
+        conn.executemany(
+            "INSERT INTO news_bands (band, value, news_id) VALUES (?, ?, ?)",
+            [(band, band_value, news_id) for band, band_value in bands]
+        )
+        return cluster_id
+
+    def _bump_version(self, conn):
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'news_version'")
+
+    def version(self):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'news_version'").fetchone()
+        return row[0] if row else 0
+
+    def purge_older_than(self, days=NEWS_RETENTION_DAYS):
+        cutoff = int(time.time()) - days * 86400
+        with self.conn as conn:
+            cur = conn.execute("DELETE FROM news WHERE published_ts < ?", (cutoff,))
+            if cur.rowcount:
+                # Lets cached copies drop the same items without reloading
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('purged_before', ?)", (cutoff,))
+                self._bump_version(conn)
+            return cur.rowcount
+
+    def purged_before(self):
+        """Epoch cutoff of the last purge that deleted anything (0 if none yet)"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'purged_before'").fetchone()
+        return row[0] if row else 0
+
+    def newest(self, limit, after_id=0):
+        """(items, last_id): the newest `limit` items among those with id > after_id, newest
+        first, and the highest id seen. Passing last_id back returns only rows added since."""
+        rows = self.conn.execute(f"""
+            SELECT id, {', '.join(RECORD_COLUMNS)} FROM news WHERE id > ?
+            ORDER BY published_ts DESC, id DESC LIMIT ?
+        """, (after_id, limit)).fetchall()
+        last_id = max([after_id] + [row['id'] for row in rows])
+        return [NewsRecord(*row[1:]) for row in rows], last_id
+
+    def load(self, limit=None, offset=0, since=None):
+        """Newest first. `since` is a lower bound on the publish time (see to_timestamp);
+        ValueError if it can't be read as one."""
+        sql = f"SELECT {', '.join(RECORD_COLUMNS)} FROM news"
+        params = []
+        if since is not None:
+            sql += " WHERE published_ts >= ?"
+            params.append(require_timestamp(since))
+        sql += " ORDER BY published_ts DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([limit, offset])
+        elif offset:
+            sql += " LIMIT -1 OFFSET ?"
+            params.append(offset)
+        return [NewsRecord(*row) for row in self.conn.execute(sql, params)]
+
+    def page(self, limit=20, cursor=None, **filters):
+        """One page of news, newest first, narrowed by source/category/date filters.
+        Keyset pagination: `cursor` is the (published_ts, id) the previous page ended at, so
+        every page is an index range scan no matter how deep the reader goes.
+        Returns (items, next_cursor); next_cursor is None on the last page."""
+        # An IN list can't walk the (source|category, published_ts) index in order, so each
+        # selected value gets its own range scan and SQLite merges the short results
+        split = next((name for name in ('sources', 'categories') if len(filters.get(name) or ()) > 1), None)
+        branches = [dict(filters, **{split: [value]}) for value in filters[split]] if split else [filters]
+        selects, params = [], []
+        for branch in branches:
+            terms, branch_params = _filter_clause(**branch)
+            if cursor is not None:
+                terms.append("(published_ts, id) < (?, ?)")
+                branch_params.extend(cursor)
+            where = " WHERE " + " AND ".join(terms) if terms else ""
+            selects.append(f"""
+                SELECT * FROM (
+                    SELECT id, {', '.join(RECORD_COLUMNS)} FROM news{where}
+                    ORDER BY published_ts DESC, id DESC LIMIT ?
+                )
+            """)
+            params.extend(branch_params + [limit])
+        sql = " UNION ALL ".join(selects) + " ORDER BY published_ts DESC, id DESC LIMIT ?"
+        rows = self.conn.execute(sql, params + [limit]).fetchall()
+        items = [NewsRecord(*row[1:]) for row in rows]
+        next_cursor = (rows[-1]['published_ts'], rows[-1]['id']) if len(rows) == limit else None
+        return items, next_cursor
+
+    def last_id(self):
+        """Highest row id so far; anything stored later gets a larger one"""
+        return self.conn.execute("SELECT IFNULL(MAX(id), 0) FROM news").fetchone()[0]
+
+    def count_added(self, after_id, **filters):
+        """Items matching the browsing filters stored after row `after_id`"""
+        terms, params = _filter_clause(**filters)
+        sql = "SELECT COUNT(*) FROM news WHERE " + " AND ".join(["id > ?"] + terms)
+        return self.conn.execute(sql, [after_id] + params).fetchone()[0]
+
+    def facet_rows(self):
+        """(day, source, category, count) buckets over the whole archive"""
+        return [tuple(row) for row in self.conn.execute("SELECT day, source, category, count FROM news_facets")]
+
+    def search(self, query, limit=20, **filters):
+        """Ranked full-text search: all terms must match, titles weigh more than summaries,
+        and relevance decays with age so recent stories win ties."""
+        match = build_match_query(query)
+        if not match:
+            return []
+        if not self.fts_enabled:
+            return self._search_like(query, limit, **filters)
+        terms, filter_params = _filter_clause(prefix='f.', **filters)
+        # Scoring is bounded to the newest SEARCH_CANDIDATES matches (rowid order = insert order)
+        # so latency doesn't grow with the archive for very common terms. The browsing filters
+        # apply before that cut, so an old match within the selected sources/dates still counts.
+        sql = f"""
+            SELECT {', '.join('n.' + col for col in RECORD_COLUMNS)}
+            FROM (
+                SELECT news_fts.rowid AS rowid, bm25(news_fts, 3.0, 1.0) AS score
+                FROM news_fts
+                {"JOIN news f ON f.id = news_fts.rowid" if terms else ""}
+                WHERE news_fts MATCH ? {"AND " + " AND ".join(terms) if terms else ""}
+                ORDER BY news_fts.rowid DESC
+                LIMIT ?
+            ) AS m
+            JOIN news n ON n.id = m.rowid
+            ORDER BY m.score / (1.0 + MAX(? - n.published_ts, 0) / ?)
+            LIMIT ?
+        """
+        params = [match] + filter_params + [SEARCH_CANDIDATES, int(time.time()), SEARCH_RECENCY_DAYS * 86400.0, limit]
+        return [NewsRecord(*row) for row in self.conn.execute(sql, params)]
+
+    def _search_like(self, query, limit, **filters):
+        terms = query.lower().split()
+        filter_terms, filter_params = _filter_clause(**filters)
+        where = " AND ".join(["(lower(title) LIKE ? OR lower(summary) LIKE ?)" for _ in terms] + filter_terms)
+        params = [p for term in terms for p in (f"%{term}%", f"%{term}%")] + filter_params
+        sql = f"SELECT {', '.join(RECORD_COLUMNS)} FROM news WHERE {where} ORDER BY published_ts DESC, id DESC LIMIT ?"
+        return [NewsRecord(*row) for row in self.conn.execute(sql, params + [limit])]
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM news").fetchone()[0]
@@ -0,0 +1,156 @@
+from datetime import datetime
+from src.dedup import source_names
+
+# Tokens allowed for the news block of each persona prompt
+PROMPT_NEWS_TOKEN_BUDGET = 1500
+PROMPT_MAX_STORIES = 50
+
+# Map-reduce mode: stories are summarised in chunks, personas read the digests
+DIGEST_TOKEN_BUDGET = 6000        # Digest tokens per persona prompt
+DIGEST_CHUNK_WINDOW = 3 * 3600    # Stories of one category published in the same window share a chunk
+DIGEST_CHUNK_MAX_STORIES = 40
+DIGEST_SNIPPET_CHARS = 150        # Summary text per story in a chunk prompt
+DIGEST_TOKEN_ESTIMATE = 250       # Expected digest length, for planning which chunks to summarise
+
+# Per-persona relevance keywords (matched against title + category)
+PERSONA_KEYWORDS = {
+    "macro": [
+        "금리", "기준금리", "환율", "달러", "원화", "유가", "물가", "인플레", "CPI", "연준", "Fed", "FOMC",
+        "한은", "한국은행", "국채", "GDP", "성장률", "경기", "수출", "무역", "관세", "전쟁", "외교", "중국",
+        "미국", "고용", "실업", "유동성", "부동산",
+    ],
+    "sector": [
+        "반도체", "HBM", "2차전지", "배터리", "자동차", "전기차", "방산", "조선", "바이오", "제약", "화학",
+        "철강", "건설", "게임", "엔터", "항공", "해운", "은행", "증권", "보험", "AI", "로봇", "원전", "수주",
+        "실적", "영업이익", "매출", "삼성전자", "SK하이닉스", "LG에너지솔루션", "현대차", "기아", "에코프로",
+        "포스코", "네이버", "카카오", "셀트리온", "한화", "엔비디아", "테슬라", "애플",
+    ],
+    "risk": [
+        "하락", "급락", "폭락", "약세", "우려", "리스크", "위험", "불확실", "경고", "부진", "적자", "감소",
+        "둔화", "침체", "쇼크", "부도", "파산", "소송", "제재", "규제", "조사", "매도", "공매도", "변동성",
+        "긴축", "갈등",
+    ],
+}
+
+RECENCY_WEIGHT = 1.0      # Newest story 1.0, oldest candidate ~0
+RELEVANCE_WEIGHT = 0.6    # Per keyword hit, capped at 3 hits
+COVERAGE_WEIGHT = 0.3     # Per extra outlet covering the story, capped at 3
+CATEGORY_DECAY = 0.8      # Score multiplier per story already picked from the same category
+
+
+def estimate_tokens(text):
+    """Fast local token estimate: ~4 ASCII characters per token, ~0.7 tokens per Hangul/CJK character.
+    Close enough to Gemini's tokenizer for budgeting; never used for billing."""
+    if not text:
+        return 0
+    ascii_chars = len(text.encode('ascii', 'ignore'))
+    return int(ascii_chars / 4 + (len(text) - ascii_chars) * 0.7) + 1
+
+
+def _news_line(item, members):
+    sources = source_names(members)
+    coverage = f" ({len(sources)}개 매체 보도)" if len(sources) > 1 else ""
+    return f"[{item['source']}] {item['title']}{coverage}"
+
+
+def _relevance(item, keywords):
+    text = f"{item['title']} {item.get('category') or ''}".lower()
+    return min(3, sum(1 for keyword in keywords if keyword.lower() in text))
+
+
+def select_news(clusters, persona_key, budget=PROMPT_NEWS_TOKEN_BUDGET, max_stories=PROMPT_MAX_STORIES):
+    """Picks stories for one persona under a token budget.
+    `clusters` is [(representative, members)] newest first. Stories are chosen greedily by
+    recency + persona relevance + outlet coverage, with a decay on categories already picked
+    so one busy feed can't fill the prompt. Returns (news_text, picked representatives, tokens)."""
+    keywords = PERSONA_KEYWORDS.get(persona_key, [])
+    total = len(clusters)
+    candidates = []
+    for rank, (item, members) in enumerate(clusters):
+        line = _news_line(item, members)
+        base = (
+            RECENCY_WEIGHT * (1 - rank / total)
+            + RELEVANCE_WEIGHT * _relevance(item, keywords)
+            + COVERAGE_WEIGHT * min(3, len(source_names(members)) - 1)
+        )
+        candidates.append({
+            "rank": rank,
+            "item": item,
+            "line": line,
+            "tokens": estimate_tokens(line) + 2,  # numbering and newline
+            "base": base,
+            "category": item.get('category'),
+        })
+
+    picked = []
+    used = 0
+    category_counts = {}
+    while candidates and len(picked) < max_stories:
+        best = max(candidates, key=lambda c: c["base"] * CATEGORY_DECAY ** category_counts.get(c["category"], 0))
+        candidates.remove(best)
+        if used + best["tokens"] > budget:
+            # Smaller lines may still fit
+            continue
+        picked.append(best)
+        used += best["tokens"]
+        category_counts[best["category"]] = category_counts.get(best["category"], 0) + 1
+
+    # Present the selection newest first, like the original list
+    picked.sort(key=lambda c: c["rank"])
+    news_text = "".join(f"{i+1}. {c['line']}\n" for i, c in enumerate(picked))
+    return news_text, [c["item"] for c in picked], estimate_tokens(news_text)
+
+
+def chunk_stories(clusters, window=DIGEST_CHUNK_WINDOW, max_stories=DIGEST_CHUNK_MAX_STORIES):
+    """Partitions stories by category and publish-time window, newest chunk first.
+    Windows are fixed slots of epoch time, so new stories only ever change the chunks
+    they land in and every other chunk keeps its content (and its cached digest).
+    Returns [{"category", "start", "end", "stories", "text"}]."""
+    groups = {}
+    for item, members in clusters:
+        slot = (item.get('published_ts') or 0) // window
+        groups.setdefault((item.get('category') or '기타', slot), []).append((item, members))
+
+    chunks = []
+    for (category, slot), stories in groups.items():
+        # Oldest first, so a full chunk stays as it is and newcomers open the next part
+        stories.sort(key=lambda story: (story[0].get('published_ts') or 0, story[0]['link']))
+        for part in range(0, len(stories), max_stories):
+            part_stories = stories[part:part + max_stories]
+            start, end = slot * window, (slot + 1) * window
+            header = (f"[{category}] {datetime.fromtimestamp(start).strftime('%m-%d %H:%M')}"
+                      f"~{datetime.fromtimestamp(end).strftime('%H:%M')} ({len(part_stories)}건)")
+            lines = []
+            for item, members in part_stories:
+                snippet = (item.get('snippet') or '')[:DIGEST_SNIPPET_CHARS]
+                lines.append(f"- {_news_line(item, members)}" + (f": {snippet}" if snippet else ""))
+            chunks.append({
+                "category": category,
+                "start": start,
+                "end": end,
+                "stories": part_stories,
+                "text": header + "\n" + "\n".join(lines),
+            })
+    chunks.sort(key=lambda chunk: (chunk["start"], len(chunk["stories"])), reverse=True)
+    return chunks
+
+
+def plan_chunks(chunks, budget=DIGEST_TOKEN_BUDGET):
+    """Newest chunks whose digests are expected to fit the persona budget.
+    Bounds the number of summarisation calls however much news there is."""
+    return chunks[:max(1, budget // DIGEST_TOKEN_ESTIMATE)]
+
+
+def assemble_digests(digests, budget=DIGEST_TOKEN_BUDGET):
+    """News block built from (chunk, digest) pairs, newest first, under the token budget.
+    Returns (news_text, chunks used, tokens)."""
+    blocks = []
+    used = 0
+    for chunk, digest in digests:
+        block = f"### {chunk['text'].splitlines()[0]}\n{digest.strip()}\n"
+        tokens = estimate_tokens(block)
+        if blocks and used + tokens > budget:
+            break
+        blocks.append(block)
+        used += tokens
+    return "\n".join(blocks), len(blocks), used
@@ -0,0 +1,183 @@
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from src.data_files import retire_legacy_file
+from src.news_store import DB_FILE, get_connection, claim_migration
+
+# Rollup bucket per granularity: the day, or the Monday that starts the week (local time)
+ROLLUP_BUCKETS = {
+    "day": lambda dt: dt.strftime('%Y-%m-%d'),
+    "week": lambda dt: (dt - timedelta(days=dt.weekday())).strftime('%Y-%m-%d'),
+}
+
+
+class ReportArchive:
+    """Append-only history of generated reports in SQLite.
+    Every save adds one report row, one row per sector score, and folds the scores into
+    daily/weekly rollups (additive upserts), so trend queries read a handful of
+    pre-aggregated rows however long the history grows."""
+
+    def __init__(self, db_path=DB_FILE):
+        self.db_path = db_path
+        self._init_schema()
+
+    @property
+    def conn(self):
+        return get_connection(self.db_path)
+
+    def _init_schema(self):
+        with self.conn as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS reports (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    chart_data TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_reports_timestamp ON reports(timestamp)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sector_scores (
+                    report_id INTEGER NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    sector TEXT NOT NULL,
+                    sentiment TEXT NOT NULL,
+                    score INTEGER NOT NULL,
+                    tickers TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sector_scores_report ON sector_scores(report_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sector_scores_sector ON sector_scores(sector, timestamp)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sector_rollups (
+                    granularity TEXT NOT NULL,
+                    bucket TEXT NOT NULL,
+                    sector TEXT NOT NULL,
+                    score_sum INTEGER NOT NULL,
+                    samples INTEGER NOT NULL,
+                    bullish INTEGER NOT NULL,
+                    PRIMARY KEY (granularity, bucket, sector)
+                ) WITHOUT ROWID
+            """)
+
+    def append(self, report):
+        """Stores a report record ({timestamp, date, content, chart_data}). Returns its id."""
+        with self.conn as conn:
+            return self._insert(conn, report)
+
+    def _insert(self, conn, report):
+        created = datetime.fromisoformat(report['timestamp'])
+        chart_data = list(report.get('chart_data') or ())
+        cur = conn.execute(
+            "INSERT INTO reports (timestamp, date, content, chart_data) VALUES (?, ?, ?, ?)",
+            (report['timestamp'], report.get('date') or created.strftime('%Y-%m-%d'), report['content'],
+             json.dumps(chart_data, ensure_ascii=False))
+        )
+        report_id = cur.lastrowid
+        conn.executemany(
+            "INSERT INTO sector_scores (report_id, timestamp, sector, sentiment, score, tickers) VALUES (?, ?, ?, ?, ?, ?)",
+            [(report_id, report['timestamp'], entry['sector'], entry['sentiment'], entry['score'],
+              json.dumps(entry.get('tickers') or [], ensure_ascii=False)) for entry in chart_data]
+        )
+        conn.executemany("""
+            INSERT INTO sector_rollups (granularity, bucket, sector, score_sum, samples, bullish)
+            VALUES (?, ?, ?, ?, 1, ?)
+            ON CONFLICT (granularity, bucket, sector) DO UPDATE SET
+                score_sum = score_sum + excluded.score_sum,
+                samples = samples + 1,
+                bullish = bullish + excluded.bullish
+        """, [
+            (granularity, bucket_of(created), entry['sector'], entry['score'], int(entry['sentiment'] == "맑음"))
+            for granularity, bucket_of in ROLLUP_BUCKETS.items() for entry in chart_data
+        ])
+        return report_id
+
+    def import_json(self, json_path, prepare=None):
+        """One-time migration of the legacy reports.json (newest first, last 30 runs).
+        `prepare` may bring older records up to the current shape first. Safe to call from
+        several sessions or processes at once: only the first to claim it imports."""
+        if not os.path.exists(json_path):
+            return 0
+        reports = []
+        with self.conn as conn:
+            claimed = claim_migration(conn, 'reports.json')
+            if claimed:
+                try:
+                    with open(json_path, 'r', encoding='utf-8') as f:
+                        reports = json.load(f)
+                except (OSError, json.JSONDecodeError):
+                    pass
+            for report in reversed(reports):
+                self._insert(conn, prepare(report) if prepare else report)
+        retire_legacy_file(json_path)
+        if claimed:
+            print(f"Migrated {len(reports)} reports from {json_path}")
+        return len(reports)
+
+    def version(self):
+        """Id of the newest report; changes on every append"""
+        row = self.conn.execute("SELECT MAX(id) FROM reports").fetchone()
+        return row[0] or 0
+
+    def latest(self):
+        row = self.conn.execute("SELECT * FROM reports ORDER BY id DESC LIMIT 1").fetchone()
+        return self._record(row) if row else None
+
+    def get(self, report_id):
+        row = self.conn.execute("SELECT * FROM reports WHERE id = ?", (report_id,)).fetchone()
+        return self._record(row) if row else None
+
+    def index(self, limit=30):
+        """Newest first, without report bodies: [{id, timestamp, sectors}]"""
+        rows = self.conn.execute("""
+            SELECT r.id, r.timestamp, COUNT(s.report_id) AS sectors
+            FROM (SELECT id, timestamp FROM reports ORDER BY id DESC LIMIT ?) r
+            LEFT JOIN sector_scores s ON s.report_id = r.id
+            GROUP BY r.id ORDER BY r.id DESC
+        """, (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+
+    def sector_trend(self, granularity="day", buckets=30):
+        """Average score per sector over the last `buckets` days/weeks, oldest first:
+        [(bucket, sector, average score, reports, share of 맑음)]"""
+        if granularity not in ROLLUP_BUCKETS:
+            raise ValueError(f"Unknown granularity: {granularity}")
+        rows = self.conn.execute("""
+            SELECT bucket, sector, score_sum, samples, bullish FROM sector_rollups
+            WHERE granularity = ? AND bucket >= (
+                SELECT IFNULL(MIN(bucket), '') FROM (
+                    SELECT DISTINCT bucket FROM sector_rollups WHERE granularity = ?
+                    ORDER BY bucket DESC LIMIT ?
+                )
+            )
+            ORDER BY bucket, sector
+        """, (granularity, granularity, buckets)).fetchall()
+        return [
+            (row['bucket'], row['sector'], round(row['score_sum'] / row['samples'], 2), row['samples'],
+             round(row['bullish'] / row['samples'], 2))
+            for row in rows
+        ]
+
+    @staticmethod
+    def _record(row):
+        report = dict(row)
+        report['chart_data'] = json.loads(report['chart_data'])
+        return report
+
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def get_report_archive():
+    global _archive
+    if _archive is None:
+        with _archive_lock:
+            if _archive is None:
+                _archive = ReportArchive()
+    return _archive
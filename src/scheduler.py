@@ -1,15 +1,41 @@
+import heapq
+import queue
 import threading
 import time
 import datetime
-import streamlit as st
-from src.data_manager import DataManager
-from src.ai_analyst import AIAnalyst
+from collections import deque
+from src.data_manager import DataManager, FETCH_MAX_WORKERS
+from src.ai_analyst import AIAnalyst, PRIORITY_BACKGROUND, ANALYSIS_MAX_ITEMS
+from src.metrics import metrics, METRICS_FILE
+
+# Per-feed adaptive polling
+FEED_DEFAULT_INTERVAL = 300   # seconds, for feeds without history
+FEED_MIN_INTERVAL = 60
+FEED_MAX_INTERVAL = 1800
+FEED_TARGET_NEW_ITEMS = 2     # Poll often enough to see about this many new items each time
+FEED_RATE_SMOOTHING = 0.3     # EWMA weight of the latest publish-rate observation
+FEED_IDLE_GROWTH = 1.5        # Interval growth while a feed has published nothing yet
+FEED_ERROR_BACKOFF = 2        # Interval multiplier after a failed poll
+FEED_SYNC_INTERVAL = 30       # Max seconds before feeds.json is re-read for added feeds
+
+# Pipeline: ingest (download + parse) -> enrich (dates, dedup, clustering, store) -> analysis
+FETCHED_QUEUE_SIZE = 4        # Fetched batches waiting for enrichment; ingest blocks when full
+INGEST_WORKERS = FETCH_MAX_WORKERS
+ENRICH_WORKERS = 1            # SQLite serialises writes, and feed_state.json has a single writer
+
+# Analysis runs on "meaningful new news" instead of a clock
+ANALYSIS_NEW_ITEMS_TRIGGER = 20   # Analyse once this many new items have been stored...
+ANALYSIS_MAX_WAIT = 600           # ...or this many seconds have passed since the last analysis
+ANALYSIS_MIN_GAP = 60             # Never analyse more often than this
+ANALYSIS_STARTUP_DELAY = 60       # Time the first ingest sweep gets before the clock trigger fires
+
+METRICS_EXPORT_INTERVAL = 30      # Seconds between Prometheus text dumps to METRICS_FILE
 
 class BackgroundScheduler:
     _instance = None
     _lock = threading.Lock()
 
-    def __new__(cls):
+    def __new__(cls, api_key=None):
         if cls._instance is None:
             with cls._lock:
                 if cls._instance is None:
@@ -17,91 +43,384 @@ class BackgroundScheduler:
                     cls._instance._initialized = False
         return cls._instance
 
-    def __init__(self):
+    def __init__(self, api_key=None):
         if self._initialized:
             return
-            
+
         self._initialized = True
-        self.interval = 300  # 5 minutes (300 seconds)
         self.is_running = False
-        self.thread = None
-        self.last_run = None
-        self.next_run = None
+        self.threads = []
+        # Each start() gets its own stop event: threads of a stopped run that are still
+        # finishing a fetch or a Gemini call exit instead of joining the next run
+        self._run_stop = None
+        self.last_run = None  # Last analysis
+        self.next_run = None  # Latest time the next analysis will run
         self.status = "Stopped"
-        
+        self.feed_stats = []  # Per-feed latency/result of each feed's last poll
+        self.last_outcome = None
+        self.job_history = deque(maxlen=20)  # Recent (time, new items, outcome)
+
+        # Feed url -> polling state; the heap holds (due monotonic time, url) and
+        # may contain stale entries, the state's next_due is authoritative.
+        # next_due is None while a feed's batch is in the pipeline.
+        self.feed_schedule = {}
+        self._due_heap = []
+        self._schedule_lock = threading.Lock()
+        self._feed_results = {}
+        self._wake = threading.Event()
+
+        self.fetched_queue = queue.Queue(maxsize=FETCHED_QUEUE_SIZE)
+        # Enrich -> analysis only needs a count: analysis always reads the latest news from the store
+        self._new_since_analysis = 0
+        self._last_analysis_at = None
+        self._analysis_wake = threading.Event()
+
+        self.stage_stats = {
+            stage: {"state": "stopped", "runs": 0, "items": 0, "busy": 0.0, "blocked": 0.0}
+            for stage in ("ingest", "enrich", "analysis")
+        }
+        self._started_at = None
+        self._metrics_exported_at = 0.0
+
         # Initialize managers
         self.dm = DataManager()
-        # API Key might be loaded later or passed, but for bg task we need it from secrets
-        try:
-            api_key = st.secrets.get("GOOGLE_API_KEY")
-        except:
-            api_key = None
-            
-        self.ai = AIAnalyst(api_key=api_key) if api_key else None
+        # Headless workers pass the key from their config; inside Streamlit fall back to secrets
+        if api_key is None:
+            try:
+                import streamlit as st
+                api_key = st.secrets.get("GOOGLE_API_KEY")
+            except Exception:
+                api_key = None
+
+        self.ai = AIAnalyst(api_key=api_key, priority=PRIORITY_BACKGROUND) if api_key else None
 
     def start(self):
         if self.is_running:
             return
-        
+
+        stop = threading.Event()
+        self._run_stop = stop
         self.is_running = True
         self.status = "Running"
-        self.thread = threading.Thread(target=self._run_loop, daemon=True)
-        self.thread.start()
+        self._started_at = time.monotonic()
+        self._last_analysis_at = self._started_at - ANALYSIS_MAX_WAIT + ANALYSIS_STARTUP_DELAY
+        self.next_run = datetime.datetime.now() + datetime.timedelta(seconds=ANALYSIS_STARTUP_DELAY)
+        self.threads = [threading.Thread(target=self._ingest_loop, args=(stop,), name="pipeline-ingest", daemon=True)]
+        self.threads += [
+            threading.Thread(target=self._enrich_loop, args=(stop,), name=f"pipeline-enrich-{i}", daemon=True)
+            for i in range(ENRICH_WORKERS)
+        ]
+        self.threads.append(
+            threading.Thread(target=self._analysis_loop, args=(stop,), name="pipeline-analysis", daemon=True)
+        )
+        for thread in self.threads:
+            thread.start()
         print(f"[{datetime.datetime.now()}] Background Scheduler Started")
 
     def stop(self):
+        if self._run_stop is not None:
+            self._run_stop.set()
         self.is_running = False
         self.status = "Stopped"
-        if self.thread:
-            self.thread.join(timeout=1)
+        # Interrupt the waits immediately
+        self._wake.set()
+        self._analysis_wake.set()
+        for thread in self.threads:
+            thread.join(timeout=1)
+
+    def _record_stage(self, stage, items, busy):
+        stats = self.stage_stats[stage]
+        stats["runs"] += 1
+        stats["items"] += items
+        stats["busy"] += busy
+        metrics.observe("pipeline_stage_seconds", busy, stage=stage)
 
-    def _run_loop(self):
-        while self.is_running:
-            self.status = "Processing..."
+    def _export_metrics(self):
+        if time.monotonic() - self._metrics_exported_at < METRICS_EXPORT_INTERVAL:
+            return
+        self._metrics_exported_at = time.monotonic()
+        try:
+            metrics.write_prometheus(METRICS_FILE)
+        except OSError as e:
+            print(f"Error writing metrics: {e}")
+
+    # --- Stage 1: ingest -------------------------------------------------
+
+    def _ingest_loop(self, stop):
+        stats = self.stage_stats["ingest"]
+        while not stop.is_set():
+            stats["state"] = "idle"
+            # Cleared before the schedule is read, so a wakeup from here on is never lost
+            self._wake.clear()
+            due_feeds = []
             try:
-                self._execute_job()
-                self.last_run = datetime.datetime.now()
-                self.next_run = self.last_run + datetime.timedelta(seconds=self.interval)
-                self.status = f"Waiting (Next run: {self.next_run.strftime('%H:%M:%S')})"
+                now = time.monotonic()
+                with self._schedule_lock:
+                    self._sync_feeds(now)
+                    due_feeds = self._pop_due_feeds(now)
+                if due_feeds:
+                    stats["state"] = f"fetching {len(due_feeds)} feeds"
+                    started = time.monotonic()
+                    results = self.dm.fetch_feeds(due_feeds, INGEST_WORKERS)
+                    self._record_stage("ingest", len(due_feeds), time.monotonic() - started)
+                    self._put_fetched((due_feeds, results), stop)
             except Exception as e:
-                print(f"Scheduler Error: {e}")
+                print(f"Scheduler Error (ingest): {e}")
                 self.status = f"Error: {str(e)}"
-            
-            # Sleep in small chunks to allow stopping
-            for _ in range(self.interval):
-                if not self.is_running:
-                    break
-                time.sleep(1)
-            
-            # Initial run might have just finished, loop again
+                self._reschedule_failed(due_feeds)
+            self._export_metrics()
 
-    def _execute_job(self):
-        print(f"[{datetime.datetime.now()}] Executing Background Job...")
-        
-        # 1. Fetch News
-        new_count = self.dm.fetch_and_update_news()
-        print(f"  - Fetched {new_count} new items")
-        
-        # 2. Analyze if there are news and AI is available
-        if self.ai:
-            news = self.dm.load_news()
-            if news:
-                print("  - analyzing news...")
-                # Simple check to avoid re-analyzing if nothing changed? 
-                # For now, just analyze periodically as requested.
-                # Maybe optimization: check if latest news is newer than last report?
-                # User asked for "periodic", so we just do it.
-                
-                analysis_text = self.ai.analyze_news(news, verbose=False)
-                if "오류" not in analysis_text and "Error" not in analysis_text:
-                    self.ai.save_report(analysis_text)
-                    print("  - Report saved successfully")
-                else:
-                    print(f"  - Analysis failed: {analysis_text}")
+            # Sleep until the next feed is due; enrichment and stop() wake us up early
+            with self._schedule_lock:
+                next_wake = time.monotonic() + FEED_SYNC_INTERVAL
+                if self._due_heap:
+                    next_wake = min(next_wake, self._due_heap[0][0])
+            self._wake.wait(max(0.0, next_wake - time.monotonic()))
+
+    def _put_fetched(self, batch, stop):
+        """Hands a batch to enrichment, blocking while the queue is full (backpressure)"""
+        stats = self.stage_stats["ingest"]
+        started = time.monotonic()
+        while not stop.is_set():
+            try:
+                self.fetched_queue.put(batch, timeout=1)
+                break
+            except queue.Full:
+                stats["state"] = "blocked (enrich queue full)"
+        else:
+            # Stopped with the batch in hand: the next run's enrichment picks it up if
+            # there is room, otherwise the feeds are polled again instead of staying in flight
+            try:
+                self.fetched_queue.put_nowait(batch)
+            except queue.Full:
+                self._reschedule_failed(batch[0])
+        stats["blocked"] += time.monotonic() - started
+
+    def _sync_feeds(self, now):
+        """Adds newly registered feeds (due immediately) and forgets removed ones"""
+        feeds = {feed['url']: feed for feed in self.dm.get_feeds()}
+        for url, feed in feeds.items():
+            state = self.feed_schedule.get(url)
+            if state is None:
+                self.feed_schedule[url] = {
+                    "feed": feed,
+                    "interval": FEED_DEFAULT_INTERVAL,
+                    "rate": None,  # EWMA of new items per second
+                    "last_polled": None,
+                    "next_due": now,
+                    "next_due_at": datetime.datetime.now(),
+                    "last_new": None,
+                }
+                heapq.heappush(self._due_heap, (now, url))
             else:
-                print("  - No news to analyze")
+                state["feed"] = feed
+        for url in list(self.feed_schedule):
+            if url not in feeds:
+                del self.feed_schedule[url]
+                self._feed_results.pop(url, None)
+
+    def _pop_due_feeds(self, now):
+        due = []
+        while self._due_heap and self._due_heap[0][0] <= now:
+            due_time, url = heapq.heappop(self._due_heap)
+            state = self.feed_schedule.get(url)
+            if state is None or state["next_due"] != due_time:
+                continue  # Removed feed or superseded entry
+            # In flight until enrichment reschedules it
+            state["next_due"] = None
+            due.append(state["feed"])
+        return due
+
+    # --- Stage 2: enrich -------------------------------------------------
+
+    def _enrich_loop(self, stop):
+        stats = self.stage_stats["enrich"]
+        while not stop.is_set():
+            stats["state"] = "idle"
+            try:
+                feeds, results = self.fetched_queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            stats["state"] = f"storing {len(feeds)} feeds"
+            try:
+                started = time.monotonic()
+                new_count, feed_stats = self.dm.store_fetch_results(feeds, results)
+                self._record_stage("enrich", sum(stat['entries'] for stat in feed_stats), time.monotonic() - started)
+                print(f"[{datetime.datetime.now()}] Polled {len(feeds)} feeds: {new_count} new items")
+
+                now = time.monotonic()
+                with self._schedule_lock:
+                    for stat in feed_stats:
+                        state = self.feed_schedule.get(stat['url'])
+                        if state is None:
+                            continue
+                        self._reschedule(state, stat['new'], stat['error'] and stat['error'] != "No entries", now)
+                        self._feed_results[stat['url']] = stat
+                    self.feed_stats = list(self._feed_results.values())
+                    self._new_since_analysis += new_count
+                if new_count:
+                    self._analysis_wake.set()
+            except Exception as e:
+                print(f"Scheduler Error (enrich): {e}")
+                self.status = f"Error: {str(e)}"
+                self._reschedule_failed(feeds)
+            finally:
+                self._wake.set()
+
+    def _reschedule_failed(self, feeds):
+        now = time.monotonic()
+        with self._schedule_lock:
+            for feed in feeds:
+                state = self.feed_schedule.get(feed['url'])
+                if state is not None and state["next_due"] is None:
+                    self._reschedule(state, 0, True, now)
+
+    def _reschedule(self, state, new_items, failed, now):
+        """Adapts a feed's interval to its observed publish rate"""
+        if failed:
+            interval = state["interval"] * FEED_ERROR_BACKOFF
         else:
-            print("  - AI not initialized (No Key)")
+            if state["last_polled"] is not None:
+                # The first poll after start-up includes a backlog of unknown age, so it isn't a rate sample
+                sample = new_items / max(now - state["last_polled"], 1.0)
+                if state["rate"] is None:
+                    state["rate"] = sample
+                else:
+                    state["rate"] = FEED_RATE_SMOOTHING * sample + (1 - FEED_RATE_SMOOTHING) * state["rate"]
+            if state["rate"]:
+                interval = FEED_TARGET_NEW_ITEMS / state["rate"]
+            elif state["last_polled"] is not None:
+                interval = state["interval"] * FEED_IDLE_GROWTH
+            else:
+                interval = state["interval"]
+        state["interval"] = min(FEED_MAX_INTERVAL, max(FEED_MIN_INTERVAL, interval))
+        state["last_polled"] = now
+        state["last_new"] = new_items
+        state["next_due"] = now + state["interval"]
+        state["next_due_at"] = datetime.datetime.now() + datetime.timedelta(seconds=state["interval"])
+        heapq.heappush(self._due_heap, (state["next_due"], state["feed"]['url']))
+
+    def get_feed_schedule(self):
+        """Rows for the admin page, soonest first"""
+        rows = []
+        with self._schedule_lock:
+            for state in self.feed_schedule.values():
+                rows.append({
+                    "name": state["feed"]['name'],
+                    "interval": round(state["interval"]),
+                    "rate_per_hour": round(state["rate"] * 3600, 1) if state["rate"] is not None else None,
+                    "last_new": state["last_new"],
+                    "next_due_at": state["next_due_at"],
+                })
+        return sorted(rows, key=lambda row: row["next_due_at"])
+
+    # --- Stage 3: analysis -----------------------------------------------
+
+    def _analysis_loop(self, stop):
+        stats = self.stage_stats["analysis"]
+        while not stop.is_set():
+            stats["state"] = "idle"
+            self._analysis_wake.clear()  # Before the trigger check, like the ingest loop
+            now = time.monotonic()
+            waited = now - self._last_analysis_at
+            triggered = waited >= ANALYSIS_MAX_WAIT or (
+                self._new_since_analysis >= ANALYSIS_NEW_ITEMS_TRIGGER and waited >= ANALYSIS_MIN_GAP
+            )
+            if triggered:
+                stats["state"] = "analyzing"
+                try:
+                    started = time.monotonic()
+                    new_count = self._execute_job()
+                    self._record_stage("analysis", new_count, time.monotonic() - started)
+                except Exception as e:
+                    print(f"Scheduler Error (analysis): {e}")
+                    self.status = f"Error: {str(e)}"
+                self._last_analysis_at = time.monotonic()
+                self.last_run = datetime.datetime.now()
+                self.next_run = self.last_run + datetime.timedelta(seconds=ANALYSIS_MAX_WAIT)
+                continue
+
+            # Wake for the clock trigger, the end of the minimum gap, or new items from enrichment
+            timeout = ANALYSIS_MAX_WAIT - waited
+            if self._new_since_analysis >= ANALYSIS_NEW_ITEMS_TRIGGER:
+                timeout = min(timeout, ANALYSIS_MIN_GAP - waited)
+            self._analysis_wake.wait(max(0.0, timeout))
+
+    def _execute_job(self):
+        print(f"[{datetime.datetime.now()}] Executing Background Job...")
+
+        with self._schedule_lock:
+            new_count = self._new_since_analysis
+            self._new_since_analysis = 0
+        outcome = self._analyze()
+        print(f"  - {outcome}")
+        self.last_outcome = outcome
+        self.job_history.appendleft({
+            "time": datetime.datetime.now(),
+            "new_items": new_count,
+            "outcome": outcome,
+        })
+        return new_count
+
+    def _analyze(self):
+        if not self.ai:
+            return "AI not initialized (No Key)"
+
+        # Enough for map-reduce mode on busy days; served from the in-memory snapshot
+        news = self.dm.load_news(limit=ANALYSIS_MAX_ITEMS)
+        if not news:
+            return "No news to analyze"
+
+        # Cheap when the headline set is unchanged (the previous report is reused and
+        # nothing is re-saved) and proportional to the new stories when few have arrived.
+        analysis_text = self.ai.analyze_news(news, verbose=False)
+        if self.ai.last_analysis_cached:
+            return "skipped, unchanged"
+        if self.ai.last_report_unchanged:
+            return "reviewed new stories, report unchanged"
+        if "오류" not in analysis_text and "Error" not in analysis_text:
+            self.ai.save_report(analysis_text)
+            return f"Report saved successfully ({self.ai.last_analysis_mode})"
+        return f"Analysis failed: {analysis_text}"
+
+    def get_pipeline_stats(self):
+        """Queue depth and throughput per stage, for the admin page"""
+        uptime_min = max((time.monotonic() - self._started_at) / 60, 1e-9) if self._started_at else None
+        with self._schedule_lock:
+            in_flight = sum(1 for state in self.feed_schedule.values() if state["next_due"] is None)
+        depths = {
+            "ingest": f"{in_flight}개 피드 처리 중",
+            "enrich": f"{self.fetched_queue.qsize()}/{FETCHED_QUEUE_SIZE}",
+            "analysis": f"신규 {self._new_since_analysis}/{ANALYSIS_NEW_ITEMS_TRIGGER}건",
+        }
+        rows = []
+        for stage, stats in self.stage_stats.items():
+            rows.append({
+                "stage": stage,
+                "state": stats["state"] if self.is_running else "stopped",
+                "queue": depths[stage],
+                "runs": stats["runs"],
+                "items": stats["items"],
+                "avg_seconds": round(stats["busy"] / stats["runs"], 2) if stats["runs"] else None,
+                "items_per_min": round(stats["items"] / uptime_min, 1) if uptime_min else None,
+                "blocked_seconds": round(stats["blocked"], 1),
+            })
+        return rows
+
+    def status_snapshot(self):
+        """JSON-ready state for UI processes that don't run the scheduler themselves"""
+        def iso(value):
+            return value.isoformat() if value else None
+
+        return {
+            "status": self.status,
+            "last_run": iso(self.last_run),
+            "next_run": iso(self.next_run),
+            "job_history": [dict(job, time=iso(job["time"])) for job in list(self.job_history)],
+            "pipeline": self.get_pipeline_stats(),
+            "feed_stats": list(self.feed_stats),
+            "feed_schedule": [dict(row, next_due_at=iso(row["next_due_at"])) for row in self.get_feed_schedule()],
+        }
 
-def get_scheduler():
-    return BackgroundScheduler()
+def get_scheduler(api_key=None):
+    return BackgroundScheduler(api_key)
@@ -0,0 +1,49 @@
+import re
+import unicodedata
+
+# Hangul, CJK ideographs and kana have no reliable word boundaries in headlines
+# ("삼성전자주가" vs "삼성전자 주가"), so they are indexed as overlapping character bigrams.
+_CJK_RE = re.compile(r'[ᄀ-ᇿ぀-ヿ㄰-㆏㐀-䶿一-鿿가-힯]')
+_WORD_RE = re.compile(r'\w+')
+_TAG_RE = re.compile(r'<[^>]+>')
+
+
+def _normalize(text):
+    return unicodedata.normalize('NFKC', text or '').lower()
+
+
+def _word_tokens(word):
+    """Bigrams for CJK words, the word itself otherwise"""
+    if not _CJK_RE.search(word):
+        return [word]
+    if len(word) == 1:
+        return [word]
+    return [word[i:i + 2] for i in range(len(word) - 1)]
+
+
+def tokenize(text):
+    """Index-time tokens for a title or summary"""
+    text = _TAG_RE.sub(' ', text or '')
+    tokens = []
+    for word in _WORD_RE.findall(_normalize(text)):
+        tokens.extend(_word_tokens(word))
+    return tokens
+
+
+def index_text(text):
+    """Space-joined tokens as stored in the FTS table"""
+    return " ".join(tokenize(text))
+
+
+def build_match_query(query):
+    """Turns user input into an FTS5 MATCH expression.
+    Every term must match (AND). CJK terms match as a bigram phrase (i.e. a substring),
+    other terms and single CJK characters match as a prefix."""
+    clauses = []
+    for word in _WORD_RE.findall(_normalize(query)):
+        tokens = _word_tokens(word)
+        if len(tokens) > 1:
+            clauses.append('"' + " ".join(tokens) + '"')
+        else:
+            clauses.append('"' + tokens[0].replace('"', '""') + '"*')
+    return " AND ".join(clauses)
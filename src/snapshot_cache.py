@@ -0,0 +1,58 @@
+import os
+import threading
+
+
+class SnapshotCache:
+    """Process-wide cache of decoded data shared by every Streamlit session.
+    Each entry is stored with the version it was loaded at (a counter bumped by the
+    writer, or a file's mtime/size) and reloaded only when that version changes.
+    Cached values are handed out as-is, so loaders must return immutable data.
+    An optional `update(previous)` builds the new version from the stale one when that
+    is cheaper than a full load (e.g. merging in only the rows added since)."""
+
+    def __init__(self):
+        self._entries = {}      # key -> (version, value)
+        self._load_locks = {}   # key -> lock, so concurrent misses load once
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version, loader, update=None):
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return entry[1]
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        with load_lock:
+            # Another session may have loaded it while we waited
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            value = update(entry[1]) if entry is not None and update is not None else loader()
+            self._entries[key] = (version, value)
+            return value
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._entries),
+        }
+
+
+def file_version(path):
+    """(mtime_ns, size) of a file, None if it doesn't exist"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+snapshot_cache = SnapshotCache()
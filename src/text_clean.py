@@ -0,0 +1,91 @@
+import re
+from html.parser import HTMLParser
+
+SNIPPET_LENGTH = 200       # Characters shown under a headline
+SUMMARY_MAX_LENGTH = 2000  # Cleaned summary kept for search and analysis
+
+# Elements whose text is never article content
+SKIP_TAGS = {'script', 'style', 'noscript', 'iframe', 'object', 'svg', 'figure', 'figcaption', 'button', 'form'}
+# Elements that end a run of text, so words on either side don't get glued together
+BREAK_TAGS = {'p', 'br', 'div', 'li', 'ul', 'ol', 'tr', 'td', 'th', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+              'blockquote', 'section', 'article', 'header', 'footer', 'table', 'hr', 'img'}
+
+# Trailing feed boilerplate: "read more" links, WordPress footers, press copyright notices.
+# Every pattern only matches a short segment at the very end, so the same words
+# in the middle of a sentence are left alone.
+BOILERPLATE_PATTERNS = [
+    re.compile(p, re.IGNORECASE) for p in (
+        r'\s*The post .{0,300}? appeared first on .{0,100}$',
+        r'\s*(Continue reading|Read more|Read the full story)(\s+(on|at)\s+[^.!?]{1,40})?\W*$',
+        r'\s*\[(…|\.\.\.)\]\s*$',
+        r'\s*(기사\s*(원문|전문)\s*보기|더\s*보기|자세히\s*보기)\W*$',
+        r'\s*[<\[(]?\s*(ⓒ|©|\(c\)|copyright|저작권자).{0,80}?(무단\s*전재|재배포|all rights reserved).{0,30}$',
+        r'\s*무단\s*전재\s*(및|·|-)?\s*재배포\s*금지.{0,30}$',
+        # Reporter e-mail sign-off: "홍길동 기자 hong@example.co.kr" or "(hong@example.co.kr)"
+        r'\s*(\S{2,5}\s*기자\s*[(\[<]?\s*[\w.+-]+@[\w-]+(\.[\w-]+)+\s*[)\]>]?|[(\[<]\s*[\w.+-]+@[\w-]+(\.[\w-]+)+\s*[)\]>])\s*$',
+    )
+]
+_WHITESPACE = re.compile(r'\s+')
+
+
+class _TextExtractor(HTMLParser):
+    """Streaming tag stripper: keeps text nodes, drops markup and non-content elements.
+    Entities are decoded by the parser (convert_charrefs)."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in BREAK_TAGS:
+            self.parts.append(' ')
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BREAK_TAGS:
+            self.parts.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in BREAK_TAGS:
+            self.parts.append(' ')
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+
+def clean_html(html, max_length=SUMMARY_MAX_LENGTH):
+    """Plain text of a feed summary: tags stripped, entities decoded, whitespace collapsed,
+    trailing boilerplate removed and capped at `max_length` characters."""
+    if not html:
+        return ''
+    if '<' in html or '&' in html:
+        parser = _TextExtractor()
+        try:
+            parser.feed(html)
+            parser.close()
+            text = ''.join(parser.parts)
+        except Exception:
+            # Malformed beyond what HTMLParser tolerates: fall back to a blunt strip
+            text = re.sub(r'<[^>]*>', ' ', html)
+    else:
+        text = html
+    text = _WHITESPACE.sub(' ', text).strip()
+    for pattern in BOILERPLATE_PATTERNS:
+        text = pattern.sub('', text).rstrip()
+    return truncate(text, max_length)
+
+
+def truncate(text, length=SNIPPET_LENGTH):
+    """Cuts at the last word boundary before `length` and marks the cut with an ellipsis"""
+    if len(text) <= length:
+        return text
+    cut = text[:length]
+    space = cut.rfind(' ')
+    if space > length * 0.6:
+        cut = cut[:space]
+    return cut.rstrip(' ,.;:') + '…'
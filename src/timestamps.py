@@ -0,0 +1,70 @@
+import calendar
+import email.utils
+from datetime import date, datetime, time, timezone
+from functools import lru_cache
+
+PARSE_CACHE_SIZE = 4096  # Distinct date strings remembered; feeds repeat theirs every poll
+
+
+def entry_timestamp(entry):
+    """UTC epoch seconds of a feedparser entry, None if it carries no usable date.
+    feedparser has already parsed most dates into UTC struct_time, so the string
+    parser is only the fallback for formats it didn't recognise."""
+    for key in ('published_parsed', 'updated_parsed'):
+        parsed = entry.get(key)
+        if parsed:
+            return calendar.timegm(parsed)
+    for key in ('published', 'updated'):
+        if entry.get(key):
+            ts = parse_timestamp(entry[key])
+            if ts is not None:
+                return ts
+    return None
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_timestamp(text):
+    """UTC epoch seconds of a date string, None if it can't be parsed.
+    Strings without an offset are taken as local time, like datetime.now() writes them."""
+    text = text.strip()
+    try:
+        dt = datetime.fromisoformat(text)
+    except ValueError:
+        try:
+            dt = email.utils.parsedate_to_datetime(text)  # RFC 822, the RSS format
+        except (TypeError, ValueError):
+            dt = None
+        if dt is None:
+            from dateutil import parser as date_parser
+            try:
+                dt = date_parser.parse(text)
+            except (ValueError, OverflowError):
+                return None
+    return int(dt.timestamp())
+
+
+def to_timestamp(value):
+    """Epoch seconds for a bound given as a number, datetime, date (local midnight) or string"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    if isinstance(value, date):
+        return int(datetime.combine(value, time()).timestamp())
+    return parse_timestamp(value)
+
+
+def require_timestamp(value):
+    """to_timestamp for a bound passed in by a caller: ValueError instead of None when the
+    value can't be read as a point in time"""
+    try:
+        ts = to_timestamp(value)
+    except (AttributeError, TypeError):
+        ts = None
+    if ts is None:
+        raise ValueError(f"Not a date or time: {value!r}")
+    return ts
+
+
+def utc_isoformat(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
@@ -0,0 +1,150 @@
+import atexit
+import json
+import os
+import threading
+from collections import Counter
+from datetime import datetime
+from src.data_files import retire_legacy_file
+from src.news_store import DB_FILE, get_connection, claim_migration
+
+VISIT_FLUSH_INTERVAL = 30  # seconds between batched writes
+
+# Bucket key formats per granularity (local time)
+BUCKET_FORMATS = {
+    "hour": "%Y-%m-%d %H:00",
+    "day": "%Y-%m-%d",
+}
+
+
+class VisitorCounter:
+    """Counts visits in memory and flushes them to SQLite in batches.
+    A flush is a single transaction of additive updates (value = value + n), so
+    concurrent processes never lose each other's increments."""
+
+    def __init__(self, db_path=DB_FILE, flush_interval=VISIT_FLUSH_INTERVAL):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # One flush at a time, so a batch is written once
+        self._pending_total = 0
+        self._pending_buckets = Counter()  # (granularity, bucket) -> visits
+        self._init_schema()
+        self._persisted_total = self._read_total()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._flush_loop, name="visitor-flush", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @property
+    def conn(self):
+        return get_connection(self.db_path)
+
+    def _init_schema(self):
+        with self.conn as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS visit_totals (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS visit_buckets (
+                    granularity TEXT NOT NULL,
+                    bucket TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (granularity, bucket)
+                )
+            """)
+
+    def import_json(self, stats_path):
+        """Seeds the total from the legacy stats.json once, even when several processes
+        start at the same time"""
+        if os.path.exists(stats_path):
+            with self.conn as conn:
+                if claim_migration(conn, 'stats.json'):
+                    try:
+                        with open(stats_path, 'r', encoding='utf-8') as f:
+                            visitors = int(json.load(f).get("visitors", 0))
+                    except (OSError, ValueError, AttributeError):
+                        visitors = 0
+                    conn.execute("INSERT OR IGNORE INTO visit_totals (key, value) VALUES ('visitors', ?)", (visitors,))
+            retire_legacy_file(stats_path)
+        # Whoever imported it, this counter may have read the total before the seed
+        persisted = self._read_total()
+        with self._lock:
+            self._persisted_total = max(self._persisted_total, persisted)
+
+    def _read_total(self):
+        row = self.conn.execute("SELECT value FROM visit_totals WHERE key = 'visitors'").fetchone()
+        return row[0] if row else 0
+
+    def increment(self):
+        now = datetime.now()
+        with self._lock:
+            self._pending_total += 1
+            for granularity, fmt in BUCKET_FORMATS.items():
+                self._pending_buckets[(granularity, now.strftime(fmt))] += 1
+            return self._persisted_total + self._pending_total
+
+    def total(self):
+        """O(1): last flushed total plus visits not yet flushed"""
+        with self._lock:
+            return self._persisted_total + self._pending_total
+
+    def flush(self):
+        with self._flush_lock:
+            self._flush()
+
+    def _flush(self):
+        # The batch stays counted as pending until the refreshed stored total includes it,
+        # so total() never dips while the write is in flight
+        with self._lock:
+            total, buckets = self._pending_total, Counter(self._pending_buckets)
+        try:
+            if total:
+                with self.conn as conn:
+                    conn.execute("INSERT OR IGNORE INTO visit_totals (key, value) VALUES ('visitors', 0)")
+                    conn.execute("UPDATE visit_totals SET value = value + ? WHERE key = 'visitors'", (total,))
+                    conn.executemany("""
+                        INSERT INTO visit_buckets (granularity, bucket, count) VALUES (?, ?, ?)
+                        ON CONFLICT (granularity, bucket) DO UPDATE SET count = count + excluded.count
+                    """, [(g, b, n) for (g, b), n in buckets.items()])
+        except Exception as e:
+            print(f"Error flushing visitor stats: {e}")
+            return
+        try:
+            # Also picks up visits flushed by other processes, even when we had none to write
+            persisted = self._read_total()
+        except Exception as e:
+            print(f"Error reading visitor total: {e}")
+            persisted = self._persisted_total + total
+        with self._lock:
+            self._pending_total -= total
+            self._pending_buckets.subtract(buckets)
+            self._pending_buckets = +self._pending_buckets  # Drops the flushed (now zero) buckets
+            self._persisted_total = max(self._persisted_total, persisted)
+
+    def buckets(self, granularity="hour", limit=48):
+        """Most recent `limit` buckets, oldest first: [(bucket, visits)]"""
+        self.flush()
+        rows = self.conn.execute(
+            "SELECT bucket, count FROM visit_buckets WHERE granularity = ? ORDER BY bucket DESC LIMIT ?",
+            (granularity, limit)
+        ).fetchall()
+        return [(row[0], row[1]) for row in reversed(rows)]
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+
+
+_counter = None
+_counter_lock = threading.Lock()
+
+
+def get_visitor_counter():
+    global _counter
+    if _counter is None:
+        with _counter_lock:
+            if _counter is None:
+                _counter = VisitorCounter()
+    return _counter
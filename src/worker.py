@@ -0,0 +1,159 @@
+"""Headless background worker: feed ingestion and AI analysis without Streamlit.
+
+    python -m src.worker [--config path/to/config.toml]
+
+Any number of workers (and dashboard processes with EMBEDDED_WORKER on) may run
+against the same data directory; a lease in that directory makes exactly one of them
+the leader that runs BackgroundScheduler. The others stand by and take over when the
+leader's heartbeat stops. Dashboards read what the leader writes.
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import threading
+import time
+from datetime import datetime
+from src.leader_lease import LeaderLease, LEASE_TTL
+from src.data_files import DATA_DIR, write_json_atomic
+
+ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
+DEFAULT_CONFIG_FILE = os.path.join(ROOT_DIR, '.streamlit', 'secrets.toml')  # Same keys as the dashboard
+WORKER_STATUS_FILE = os.path.join(DATA_DIR, 'worker_status.json')
+
+# Config keys and defaults; every key can also be set as an environment variable
+CONFIG_DEFAULTS = {
+    "GOOGLE_API_KEY": None,
+    "EMBEDDED_WORKER": True,   # Dashboard processes join the election; turn off when a separate worker runs
+    "WORKER_LEASE_TTL": LEASE_TTL,
+}
+
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
+def load_config(path=None):
+    """Defaults < config file (TOML, e.g. .streamlit/secrets.toml, or DASHBOARD_CONFIG) < environment"""
+    config = dict(CONFIG_DEFAULTS)
+    path = path or os.environ.get("DASHBOARD_CONFIG") or DEFAULT_CONFIG_FILE
+    if os.path.exists(path):
+        try:
+            import tomllib
+            with open(path, 'rb') as f:
+                config.update({k: v for k, v in tomllib.load(f).items() if k in CONFIG_DEFAULTS})
+        except ImportError:
+            print(f"Python < 3.11 can't read {path}; use environment variables instead")
+        except Exception as e:
+            print(f"Error reading config {path}: {e}")
+    for key in CONFIG_DEFAULTS:
+        if os.environ.get(key):
+            config[key] = os.environ[key]
+    config["EMBEDDED_WORKER"] = _parse_bool(config["EMBEDDED_WORKER"])
+    config["WORKER_LEASE_TTL"] = float(config["WORKER_LEASE_TTL"])
+    return config
+
+
+def load_worker_status():
+    """What the current leader last published, or None if no worker has run yet"""
+    try:
+        with open(WORKER_STATUS_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+class Worker:
+    """Contends for the leader lease and runs the scheduler only while holding it"""
+
+    def __init__(self, config=None, lease=None):
+        self.config = config or load_config()
+        os.makedirs(DATA_DIR, exist_ok=True)
+        self.lease = lease or LeaderLease(ttl=self.config["WORKER_LEASE_TTL"])
+        self.heartbeat_interval = self.lease.ttl / 3
+        self.scheduler = None
+        self.is_leader = False
+        self.thread = None
+        self._stop = threading.Event()
+
+    def run(self):
+        """Blocks until stop(): heartbeat, lead or stand by"""
+        print(f"[{datetime.now()}] Worker {self.lease.owner} started")
+        try:
+            while not self._stop.is_set():
+                try:
+                    if self.lease.try_acquire():
+                        if not self.is_leader:
+                            self._lead()
+                        self._publish_status()
+                    elif self.is_leader:
+                        # Another worker took over after our heartbeat lapsed
+                        print(f"[{datetime.now()}] Worker {self.lease.owner} lost the lease, standing by")
+                        self._step_down()
+                except Exception as e:
+                    print(f"Worker Error: {e}")
+                self._stop.wait(self.heartbeat_interval)
+        finally:
+            was_leader = self.is_leader
+            self._step_down()
+            if was_leader:
+                self._publish_status()
+                self.lease.release()
+            print(f"[{datetime.now()}] Worker {self.lease.owner} stopped")
+
+    def start(self):
+        """Runs the worker on a daemon thread (dashboard processes)"""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="worker", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _lead(self):
+        from src.scheduler import get_scheduler
+        print(f"[{datetime.now()}] Worker {self.lease.owner} is now the leader")
+        self.scheduler = get_scheduler(api_key=self.config["GOOGLE_API_KEY"])
+        self.scheduler.start()
+        self.is_leader = True
+
+    def _step_down(self):
+        if self.scheduler is not None:
+            self.scheduler.stop()
+        self.is_leader = False
+
+    def _publish_status(self):
+        status = {
+            "published_at": time.time(),
+            "leader": self.lease.owner if self.is_leader else None,
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "heartbeat_interval": self.heartbeat_interval,
+            "scheduler": self.scheduler.status_snapshot() if self.scheduler else None,
+        }
+        write_json_atomic(WORKER_STATUS_FILE, status, default=str)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless feed ingestion / AI analysis worker")
+    parser.add_argument("--config", help=f"TOML config file (default: $DASHBOARD_CONFIG or {DEFAULT_CONFIG_FILE})")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    if not config["GOOGLE_API_KEY"]:
+        print("GOOGLE_API_KEY is not set: news will be collected but not analysed")
+    worker = Worker(config)
+    # Release the lease on shutdown so a standby takes over immediately
+    signal.signal(signal.SIGTERM, lambda signum, frame: worker.stop())
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        worker.stop()
+
+
+if __name__ == "__main__":
+    main()
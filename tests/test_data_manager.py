@@ -0,0 +1,59 @@
+import json
+import time
+import feedparser
+import pytest
+from src import data_manager
+from src.news_store import NewsStore
+from src.visitor_stats import VisitorCounter
+
+FEED = {'name': '테스트 경제', 'url': 'http://feeds.test/economy', 'category': 'Economy'}
+
+
+@pytest.fixture
+def dm(tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'dashboard.db')
+    monkeypatch.setattr(data_manager, 'DATA_DIR', str(tmp_path))
+    for name, file_name in (('FEEDS_FILE', 'feeds.json'), ('NEWS_FILE', 'news.json'),
+                            ('STATS_FILE', 'stats.json'), ('FEED_STATE_FILE', 'feed_state.json')):
+        monkeypatch.setattr(data_manager, name, str(tmp_path / file_name))
+    monkeypatch.setattr(data_manager, 'NewsStore', lambda: NewsStore(db_path))
+    counter = VisitorCounter(db_path, flush_interval=3600)
+    monkeypatch.setattr(data_manager, 'get_visitor_counter', lambda: counter)
+    (tmp_path / 'feeds.json').write_text(json.dumps([FEED]), encoding='utf-8')
+    yield data_manager.DataManager()
+    counter.close()
+
+
+def _result(entries, content_hash):
+    return {'name': FEED['name'], 'url': FEED['url'], 'entries': entries, 'latency': 0.1, 'error': None,
+            'cache': None, 'bytes': 100, 'state': {'content_hash': content_hash}}
+
+
+def _entry(n, **fields):
+    return feedparser.FeedParserDict(dict({
+        'title': f'기사 {n}', 'link': f'http://feeds.test/{n}', 'summary': '요약',
+        'published_parsed': time.gmtime(),
+    }, **fields))
+
+
+def test_feed_state_is_kept_when_processing_fails(dm):
+    broken = _entry(1)
+    del broken['title']  # entry.title raises while the item is built
+    _, stats = dm.store_fetch_results([FEED], [_result([broken], 'new-hash')])
+    assert stats[0]['error']
+    assert FEED['url'] not in dm.load_fetch_state()['feeds']
+
+    count, stats = dm.store_fetch_results([FEED], [_result([_entry(1)], 'new-hash')])
+    assert count == 1 and not stats[0]['error']
+    assert dm.load_fetch_state()['feeds'][FEED['url']]['content_hash'] == 'new-hash'
+
+
+def test_load_news_rejects_an_unreadable_since(dm):
+    dm.store_fetch_results([FEED], [_result([_entry(1), _entry(2)], 'hash')])
+    assert len(dm.load_news(since=time.time() - 3600)) == 2
+    assert dm.load_news(since='2999-01-01') == []
+    for since in ('어제', 'not a date', ['2026-10-01']):
+        with pytest.raises(ValueError):
+            dm.load_news(since=since)
+        with pytest.raises(ValueError):
+            dm.store.load(since=since)
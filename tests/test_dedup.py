@@ -0,0 +1,39 @@
+from src.dedup import conflicting_titles, is_near_duplicate
+from src.news_store import NewsStore
+
+
+def _item(n, title):
+    return {'title': title, 'link': f'https://example.com/{n}', 'summary': '',
+            'published': '2026-10-01T00:00:00Z', 'source': f'outlet{n}', 'category': 'economy'}
+
+
+def test_opposite_headlines_are_not_duplicates():
+    pairs = [
+        ('美 연준 기준금리 동결', '美 연준 기준금리 인하'),
+        ('코스피 하락 마감', '코스피 상승 마감'),
+        ('삼성전자, 3분기 영업이익 10조 돌파', 'SK하이닉스, 3분기 영업이익 10조 돌파'),
+        ('삼성전자 3분기 영업이익 10조…시장 예상 상회', '삼성전자 3분기 영업이익 12조…시장 예상 상회'),
+    ]
+    for a, b in pairs:
+        assert not is_near_duplicate(a, '', b, ''), (a, b)
+
+
+def test_reposts_are_duplicates():
+    assert is_near_duplicate('[속보] 美 연준 기준금리 동결 - 한국경제', '', '美 연준 기준금리 동결 | 매일경제', '')
+    assert not conflicting_titles('코스피가 하락 마감', '코스피 하락 마감')
+    assert not conflicting_titles('삼성전자 영업이익 10조원 돌파', '삼성전자, 영업이익 10조 돌파…예상 상회')
+
+
+def test_store_keeps_opposite_stories_in_separate_clusters(tmp_path):
+    store = NewsStore(str(tmp_path / 'news.db'))
+    store.insert_many([
+        _item(1, '美 연준 기준금리 동결'),
+        _item(2, '美 연준 기준금리 인하'),
+        _item(3, '코스피 하락 마감'),
+        _item(4, '코스피 상승 마감'),
+        _item(5, '[속보] 美 연준 기준금리 동결 - 한국경제'),
+    ])
+    clusters = {item['title']: item['cluster_id'] for item in store.load()}
+    assert clusters['美 연준 기준금리 동결'] != clusters['美 연준 기준금리 인하']
+    assert clusters['코스피 하락 마감'] != clusters['코스피 상승 마감']
+    assert clusters['[속보] 美 연준 기준금리 동결 - 한국경제'] == clusters['美 연준 기준금리 동결']
@@ -0,0 +1,57 @@
+import json
+import threading
+from src.news_store import NewsStore
+
+
+def _item(n, **fields):
+    return dict({'title': f'뉴스 {n}', 'link': f'https://example.com/{n}', 'summary': '',
+                 'published': '2026-10-01T00:00:00Z', 'source': 'outlet', 'category': 'economy'}, **fields)
+
+
+def test_legacy_import_runs_once_across_starts(tmp_path):
+    db_path, json_path = str(tmp_path / 'news.db'), tmp_path / 'news.json'
+    json_path.write_text(json.dumps([_item(n) for n in range(20)]), encoding='utf-8')
+    NewsStore(db_path)
+    errors = []
+
+    def start():
+        try:
+            NewsStore(db_path).import_json(str(json_path))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=start) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert NewsStore(db_path).count() == 20
+    assert not json_path.exists()
+    assert (tmp_path / 'news.json.migrated').exists()
+
+    # Later starts don't retry it, even if the file shows up again
+    json_path.write_text(json.dumps([_item(n) for n in range(20, 25)]), encoding='utf-8')
+    start()
+    assert NewsStore(db_path).count() == 20
+
+
+def test_search_filters_reach_past_the_candidate_cut(tmp_path, monkeypatch):
+    monkeypatch.setattr('src.news_store.SEARCH_CANDIDATES', 10)
+    store = NewsStore(str(tmp_path / 'news.db'))
+    store.insert_many([_item(n, title=f'반도체 수출 {n}', source='old', published='2026-09-01T00:00:00Z')
+                       for n in range(5)])
+    store.insert_many([_item(n, title=f'반도체 수출 {n}') for n in range(5, 30)])
+    assert len(store.search('반도체', limit=50, sources=['old'])) == 5
+    assert len(store.search('반도체', limit=50, since='2026-08-30', until='2026-09-02')) == 5
+    assert len(store.search('반도체', limit=50)) == 10
+
+
+def test_count_added_follows_filters(tmp_path):
+    store = NewsStore(str(tmp_path / 'news.db'))
+    store.insert_many([_item(n, title=f'기사 {n}') for n in range(3)])
+    marker = store.last_id()
+    store.insert_many([_item(3, title='새 기사 하나', source='other'), _item(4, title='새 기사 둘')])
+    assert store.count_added(marker) == 2
+    assert store.count_added(marker, sources=['other']) == 1
+    assert store.count_added(store.last_id()) == 0
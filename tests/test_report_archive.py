@@ -0,0 +1,33 @@
+import json
+import threading
+from src.report_archive import ReportArchive
+
+
+def test_legacy_import_runs_once_across_sessions(tmp_path):
+    db_path, json_path = str(tmp_path / 'reports.db'), tmp_path / 'reports.json'
+    reports = [{'timestamp': f'2026-10-{day:02d}T09:00:00', 'content': '리포트',
+                'chart_data': [{'sector': '반도체', 'sentiment': '맑음', 'score': 3}]} for day in range(1, 31)]
+    json_path.write_text(json.dumps(reports), encoding='utf-8')
+    ReportArchive(db_path)
+    errors = []
+
+    def import_once():
+        try:
+            ReportArchive(db_path).import_json(str(json_path))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=import_once) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # A copy restored later is not imported a second time
+    json_path.write_text(json.dumps(reports), encoding='utf-8')
+    import_once()
+
+    archive = ReportArchive(db_path)
+    assert errors == []
+    assert archive.count() == 30
+    assert all(samples == 1 for _, _, _, samples, _ in archive.sector_trend(buckets=30))
+    assert not json_path.exists()
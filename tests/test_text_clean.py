@@ -0,0 +1,26 @@
+from src.text_clean import clean_html
+
+
+def test_strips_tags_and_decodes_entities():
+    assert clean_html('<p>삼성전자 &amp; SK하이닉스</p><script>x()</script>') == '삼성전자 & SK하이닉스'
+
+
+def test_removes_trailing_boilerplate():
+    assert clean_html('<p>Rates held.</p><a href="#">Read more</a>') == 'Rates held.'
+    assert clean_html('Rates held. Continue reading on Reuters »') == 'Rates held.'
+    assert clean_html('Rates held. The post Fed holds appeared first on Example News.') == 'Rates held.'
+    assert clean_html('금리 동결. <저작권자 ⓒ 매일경제 & mk.co.kr, 무단전재 및 재배포 금지>') == '금리 동결.'
+    assert clean_html('금리 동결. 무단 전재 및 재배포 금지') == '금리 동결.'
+    assert clean_html('금리 동결. 홍길동 기자 hong@example.co.kr') == '금리 동결.'
+    assert clean_html('금리 동결. (hong@example.co.kr)') == '금리 동결.'
+    assert clean_html('금리 동결 기사 원문 보기') == '금리 동결'
+
+
+def test_keeps_mid_sentence_text():
+    assert clean_html('<p>Investors read more into the Fed minutes…</p>') == 'Investors read more into the Fed minutes…'
+    text = ('The copyright dispute says all rights reserved clauses were ignored, '
+            'and the court will rule on the damages next month.')
+    assert clean_html(text) == text
+    assert clean_html('Contact: jane@apple.com') == 'Contact: jane@apple.com'
+    text = '무단 전재 및 재배포 금지 조항을 어긴 업체들이 이번 달 대거 제재를 받았다는 보도가 이어졌다.'
+    assert clean_html(text) == text
@@ -0,0 +1,47 @@
+import json
+import threading
+from src.visitor_stats import VisitorCounter
+
+
+def test_total_holds_steady_while_a_flush_is_written(tmp_path):
+    counter = VisitorCounter(str(tmp_path / 'stats.db'), flush_interval=3600)
+    for _ in range(5):
+        counter.increment()
+    seen = []
+    read_total = counter._read_total
+
+    def read_total_during_flush():
+        # The batch is in the database, the in-memory counts are not updated yet
+        seen.append(counter.total())
+        return read_total()
+
+    counter._read_total = read_total_during_flush
+    counter.flush()
+    assert seen == [5]
+    counter.close()
+    assert counter.total() == 5
+    assert read_total() == 5
+
+
+def test_legacy_import_runs_once_across_starts(tmp_path):
+    db_path, stats_path = str(tmp_path / 'stats.db'), tmp_path / 'stats.json'
+    stats_path.write_text(json.dumps({"visitors": 42}), encoding='utf-8')
+    counters = [VisitorCounter(db_path, flush_interval=3600) for _ in range(4)]
+    errors = []
+
+    def start(counter):
+        try:
+            counter.import_json(str(stats_path))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=start, args=(counter,)) for counter in counters]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert [counter.total() for counter in counters] == [42] * 4
+    assert not stats_path.exists()
+    for counter in counters:
+        counter.close()